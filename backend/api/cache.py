@@ -0,0 +1,92 @@
+from hashlib import md5
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+RECIPE_CACHE_PREFIX = 'recipe_cache'
+GLOBAL_GENERATION = f'{RECIPE_CACHE_PREFIX}:generation:global'
+LIST_GENERATION = f'{RECIPE_CACHE_PREFIX}:generation:list'
+RECIPE_GENERATION = f'{RECIPE_CACHE_PREFIX}:generation:recipe:{{}}'
+HITS_KEY = f'{RECIPE_CACHE_PREFIX}:hits'
+MISSES_KEY = f'{RECIPE_CACHE_PREFIX}:misses'
+
+# Для анонимов эти фильтры ничего не меняют.
+IGNORED_PARAMS = ('is_favorited', 'is_in_shoppingcart')
+
+
+def get_generations(*keys):
+    """Текущие поколения кэша, отсутствующие создаются."""
+    generations = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in generations}
+    if missing:
+        cache.set_many(missing, None)
+        generations.update(missing)
+    return [generations[key] for key in keys]
+
+
+def bump_generations(*keys):
+    """
+    Сбрасывает поколения после фиксации транзакции,
+    чтобы в кэш не попали данные, которых ещё не видно другим запросам.
+    """
+    if keys:
+        transaction.on_commit(
+            lambda: cache.set_many({key: uuid4().hex for key in keys}, None)
+        )
+
+
+def invalidate_all():
+    bump_generations(GLOBAL_GENERATION)
+
+
+def invalidate_recipes(*recipe_ids):
+    bump_generations(
+        LIST_GENERATION,
+        *(RECIPE_GENERATION.format(recipe_id) for recipe_id in recipe_ids),
+    )
+
+
+def get_list_key(request):
+    """Ключ страницы списка по нормализованным параметрам запроса."""
+    params = sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+        if name not in IGNORED_PARAMS
+    )
+    digest = md5(
+        f'{request.get_host()}{request.path}{params}'.encode()
+    ).hexdigest()
+    global_generation, list_generation = get_generations(
+        GLOBAL_GENERATION, LIST_GENERATION
+    )
+    return (
+        f'{RECIPE_CACHE_PREFIX}:list:{global_generation}:'
+        f'{list_generation}:{digest}'
+    )
+
+
+def get_detail_key(pk):
+    pk = int(pk)
+    global_generation, recipe_generation = get_generations(
+        GLOBAL_GENERATION, RECIPE_GENERATION.format(pk)
+    )
+    return (
+        f'{RECIPE_CACHE_PREFIX}:detail:{pk}:{global_generation}:'
+        f'{recipe_generation}'
+    )
+
+
+def count_hit(hit):
+    key = HITS_KEY if hit else MISSES_KEY
+    if not cache.add(key, 1, None):
+        cache.incr(key)
+
+
+def get_stats():
+    stats = cache.get_many((HITS_KEY, MISSES_KEY))
+    return stats.get(HITS_KEY, 0), stats.get(MISSES_KEY, 0)
+
+
+def reset_stats():
+    cache.delete_many((HITS_KEY, MISSES_KEY))
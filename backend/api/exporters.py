@@ -0,0 +1,191 @@
+import csv
+from datetime import datetime as dt
+from itertools import chain
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import BaseRenderer
+
+from foodgram.constants import (
+    EXPORT_CHUNK_SIZE,
+    FILE_NAME,
+    PDF_FONT_NAME,
+    PDF_FONT_SIZE,
+    PDF_LINE_HEIGHT,
+    PDF_MARGIN,
+    PDF_SPOOL_SIZE,
+)
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFError, TTFont
+    from reportlab.pdfgen import canvas
+except ImportError:
+    canvas = None
+
+SHOPPING_CART_RENDERERS = {}
+
+
+class ExportUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Выгрузка в этом формате сейчас недоступна.'
+    default_code = 'export_unavailable'
+
+
+def register_renderer(renderer_class):
+    """Регистрирует формат выгрузки списка покупок."""
+    SHOPPING_CART_RENDERERS[renderer_class.format] = renderer_class
+    return renderer_class
+
+
+class ShoppingCartRenderer(BaseRenderer):
+    """
+    Базовый класс выгрузки списка покупок.
+    Формат выбирается DRF по параметру ?format=,
+    сама выгрузка отдаётся генератором stream.
+    """
+
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Ответы с ошибками отдаются простым текстом."""
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return str(data).encode(self.charset or 'utf-8')
+
+    def get_content_type(self):
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+    def get_filename(self, user):
+        return f'{user.username}_{FILE_NAME}.{self.format}'
+
+    def prepare(self):
+        """
+        Подготовка до начала ответа: ошибки здесь ещё можно
+        вернуть обычным ответом, а не оборванным потоком.
+        """
+
+    def stream(self, ingredients, user):
+        """Возвращает выгрузку по частям."""
+        raise NotImplementedError(
+            'ShoppingCartRenderer.stream() must be implemented.'
+        )
+
+
+@register_renderer
+class TextShoppingCartRenderer(ShoppingCartRenderer):
+    """Выгрузка списка покупок в текстовый файл."""
+
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, ingredients, user):
+        today = dt.today()
+        yield (
+            f'Список покупок для пользователя: {user.username}\n\n'
+            f'Дата: {today:%Y-%m-%d}\n\n'
+        )
+        for ingredient in ingredients:
+            yield (
+                f'- {ingredient["ingredient__name"]} '
+                f'({ingredient["ingredient__measurement_unit"]})'
+                f' - {ingredient["amount"]}\n'
+            )
+        yield f'\nFoodgram ({today:%Y})'
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+@register_renderer
+class CSVShoppingCartRenderer(ShoppingCartRenderer):
+    """Выгрузка списка покупок в CSV."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, ingredients, user):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for ingredient in ingredients:
+            yield writer.writerow((
+                ingredient['ingredient__name'],
+                ingredient['ingredient__measurement_unit'],
+                ingredient['amount'],
+            ))
+
+
+if canvas is not None:
+
+    @register_renderer
+    class PDFShoppingCartRenderer(ShoppingCartRenderer):
+        """
+        Выгрузка списка покупок в PDF.
+        Документ собирается во временном файле,
+        который сбрасывается на диск после PDF_SPOOL_SIZE байт.
+        Это ограничивает только готовый файл: Canvas держит
+        все страницы в памяти до save(), и первый байт ответа
+        уходит только после сборки всего документа.
+        """
+
+        media_type = 'application/pdf'
+        format = 'pdf'
+        charset = None
+
+        @staticmethod
+        def get_font():
+            if PDF_FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+                pdfmetrics.registerFont(
+                    TTFont(PDF_FONT_NAME, settings.SHOPPING_CART_PDF_FONT)
+                )
+            return PDF_FONT_NAME
+
+        def prepare(self):
+            """Без шрифта PDF не собрать - сообщаем об этом до ответа."""
+            try:
+                self.get_font()
+            except (OSError, TTFError):
+                raise ExportUnavailable()
+
+        def stream(self, ingredients, user):
+            today = dt.today()
+            font = self.get_font()
+            height = A4[1]
+            with SpooledTemporaryFile(max_size=PDF_SPOOL_SIZE) as buffer:
+                pdf = canvas.Canvas(buffer, pagesize=A4)
+                pdf.setFont(font, PDF_FONT_SIZE)
+                y = height - PDF_MARGIN
+                lines = (
+                    f'- {ingredient["ingredient__name"]} '
+                    f'({ingredient["ingredient__measurement_unit"]})'
+                    f' - {ingredient["amount"]}'
+                    for ingredient in ingredients
+                )
+                header = (
+                    f'Список покупок для пользователя: {user.username}',
+                    f'Дата: {today:%Y-%m-%d}',
+                    '',
+                )
+                footer = ('', f'Foodgram ({today:%Y})')
+                for line in chain(header, lines, footer):
+                    if y < PDF_MARGIN:
+                        pdf.showPage()
+                        pdf.setFont(font, PDF_FONT_SIZE)
+                        y = height - PDF_MARGIN
+                    pdf.drawString(PDF_MARGIN, y, line)
+                    y -= PDF_LINE_HEIGHT
+                pdf.save()
+                buffer.seek(0)
+                chunk = buffer.read(EXPORT_CHUNK_SIZE)
+                while chunk:
+                    yield chunk
+                    chunk = buffer.read(EXPORT_CHUNK_SIZE)
@@ -0,0 +1,123 @@
+from collections.abc import Mapping
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import (
+    MANY_RELATION_KWARGS,
+    ManyRelatedField,
+    PrimaryKeyRelatedField,
+)
+from rest_framework.serializers import ListSerializer
+
+DOES_NOT_EXIST = (
+    'Недопустимый первичный ключ "{pk_value}" - объект не существует.'
+)
+INCORRECT_TYPE = (
+    'Некорректный тип. Ожидалось значение первичного ключа, '
+    'получен {data_type}.'
+)
+
+
+def to_pk(value):
+    """Приводит значение к первичному ключу, None - если это невозможно."""
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def resolve_pks(queryset, pks):
+    """Объекты по списку первичных ключей одним запросом IN."""
+    return queryset.in_bulk({pk for pk in pks if pk is not None})
+
+
+class BulkManyRelatedField(ManyRelatedField):
+    """
+    Список связанных объектов, который разрешается одним запросом.
+    Об ошибках сообщается сразу по всем отсутствующим id.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        pks = [to_pk(value) for value in data]
+        instances = resolve_pks(self.child_relation.get_queryset(), pks)
+        errors = []
+        for value, pk in zip(data, pks):
+            if pk is None:
+                errors.append(
+                    INCORRECT_TYPE.format(data_type=type(value).__name__)
+                )
+            elif pk not in instances:
+                errors.append(DOES_NOT_EXIST.format(pk_value=pk))
+        if errors:
+            raise ValidationError(errors)
+        return [instances[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField, у которого many=True - один запрос."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
+class BulkRelatedListSerializer(ListSerializer):
+    """
+    Список вложенных сериализаторов, у которых поле related_field
+    содержит id объекта из queryset.
+    Все id разрешаются одним запросом и заменяются объектами,
+    ошибки возвращаются по каждому элементу списка.
+    """
+
+    related_field = 'id'
+    queryset = None
+
+    def to_internal_value(self, data):
+        try:
+            items = super().to_internal_value(data)
+        except ValidationError as exc:
+            if not isinstance(exc.detail, list):
+                raise
+            self.check_pks(
+                [self.get_raw_pk(item) for item in data], exc.detail
+            )
+            raise
+        pks = [to_pk(item[self.related_field]) for item in items]
+        instances = self.check_pks(pks, [{} for _ in pks])
+        for item, pk in zip(items, pks):
+            item[self.related_field] = instances[pk]
+        return items
+
+    def get_raw_pk(self, item):
+        if not isinstance(item, Mapping):
+            return None
+        return to_pk(item.get(self.related_field))
+
+    def check_pks(self, pks, errors):
+        """
+        Разрешает id одним запросом и добавляет к ошибкам элементов
+        ошибки отсутствующих id, чтобы вернуть все ошибки сразу.
+        """
+        instances = resolve_pks(self.queryset.all(), pks)
+        errors = [dict(error) for error in errors]
+        for error, pk in zip(errors, pks):
+            if (
+                pk is not None
+                and pk not in instances
+                and self.related_field not in error
+            ):
+                error[self.related_field] = [
+                    DOES_NOT_EXIST.format(pk_value=pk)
+                ]
+        if any(errors):
+            raise ValidationError(errors)
+        return instances
@@ -1,6 +1,7 @@
 from django_filters import rest_framework as filters
 
 from recipes.models import Ingredient, Recipe, Tag
+from recipes.search import search_recipes
 
 
 class IngredientSearchFilter(filters.FilterSet):
@@ -21,6 +22,7 @@ class RecipeFilter(filters.FilterSet):
     is_in_shoppingcart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='filter_search')
 
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
@@ -33,6 +35,9 @@ class RecipeFilter(filters.FilterSet):
             return queryset.filter(shopping_cart__user=self.request.user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
     class Meta:
         model = Recipe
         fields = (
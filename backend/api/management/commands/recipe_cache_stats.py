@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = 'Статистика кэша рецептов для анонимных пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='reset hit/miss counters'
+        )
+
+    def handle(self, *args, **options):
+        hits, misses = get_stats()
+        total = hits + misses
+        ratio = hits / total * 100 if total else 0
+        self.stdout.write(
+            f'Попаданий: {hits}, промахов: {misses}, '
+            f'доля попаданий: {ratio:.1f}%'
+        )
+        if options['reset']:
+            reset_stats()
+            self.stdout.write('Счётчики сброшены')
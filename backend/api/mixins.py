@@ -0,0 +1,111 @@
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from foodgram.constants import CATALOG_MAX_AGE, RECIPE_CACHE_TIMEOUT
+from recipes.catalog import get_catalog_version
+
+from .cache import count_hit, get_detail_key, get_list_key
+
+
+class CatalogConditionalMixin:
+    """
+    Условные GET-запросы для справочников.
+    ETag и Last-Modified берутся из версии справочника,
+    при совпадении отдаётся 304 без запросов к базе и сериализации.
+    """
+
+    def get_catalog_etag(self, version):
+        return (
+            f'"{self.queryset.model._meta.model_name}-{version.token}'
+            f'-{self.request.accepted_renderer.format}"'
+        )
+
+    @staticmethod
+    def strip_weak(etag):
+        return etag[2:] if etag.startswith('W/') else etag
+
+    def is_not_modified(self, request, etag, version):
+        """
+        If-None-Match сравнивается слабо (RFC 7232): прокси со сжатием
+        отдаёт ETag как W/"...", и клиент присылает его в таком виде.
+        """
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return etags == ['*'] or self.strip_weak(etag) in {
+                self.strip_weak(tag) for tag in etags
+            }
+        if_modified_since = parse_http_date_safe(
+            request.headers.get('If-Modified-Since')
+        )
+        return (
+            if_modified_since is not None
+            and version.modified <= if_modified_since
+        )
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        version = get_catalog_version(self.queryset.model)
+        etag = self.get_catalog_etag(version)
+        if self.is_not_modified(request, etag, version):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(version.modified)
+        response['Cache-Control'] = f'public, max-age={CATALOG_MAX_AGE}'
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Кэш списка и страниц рецептов для анонимных пользователей.
+    Для них флаги избранного и корзины всегда ложны,
+    поэтому ответ зависит только от параметров запроса.
+    """
+
+    def cached_response(self, key, handler, request, *args, **kwargs):
+        data = cache.get(key)
+        if data is not None:
+            count_hit(True)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        count_hit(False)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, RECIPE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(
+            get_list_key(request), super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = str(kwargs.get(self.lookup_field, ''))
+        if request.user.is_authenticated or not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        return self.cached_response(
+            get_detail_key(pk),
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
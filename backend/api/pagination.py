@@ -1,4 +1,14 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from foodgram.constants import PAGE_SIZE
 
@@ -6,3 +16,121 @@ from foodgram.constants import PAGE_SIZE
 class LimitPageNumberPagination(PageNumberPagination):
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+
+
+class KeysetPagination(LimitPageNumberPagination):
+    """
+    Постраничная пагинация с переходом на keyset по параметру cursor.
+    Без cursor работает как LimitPageNumberPagination.
+    С cursor (для первой страницы - пустым) выборка продолжается
+    после последней записи предыдущей страницы по полям ordering,
+    без COUNT(*) и OFFSET.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    ordering = ('-pub_date', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position:
+            try:
+                queryset = queryset.filter(
+                    self.get_position_filter(queryset.model, position)
+                )
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_ordering(self, queryset):
+        """
+        Порядок, заданный queryset (например, ?ordering=), дополняется id
+        для однозначности. Если порядка нет - используется ordering.
+        """
+        ordering = tuple(queryset.query.order_by)
+        if not ordering or not all(
+            isinstance(field, str) for field in ordering
+        ):
+            return self.ordering
+        if not {'id', '-id', 'pk', '-pk'} & set(ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def get_position_filter(self, model, position):
+        """
+        Условие "строго после position" в порядке ordering:
+        (a > x) OR (a = x AND b > y) OR ...
+        Значения из курсора приводятся полями модели, поэтому
+        подделанный курсор даёт ValidationError здесь, а не в базе.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            try:
+                value = model._meta.get_field(
+                    'id' if name == 'pk' else name
+                ).to_python(value)
+            except FieldDoesNotExist:
+                pass
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (BinasciiError, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, instance):
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            position.append(value)
+        return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'results': data,
+        })
+
+
+class SubscriptionPagination(KeysetPagination):
+    """Keyset по email - в том же порядке, что и постраничная выдача."""
+
+    ordering = ('email',)
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.http.multipartparser import MultiPartParser as DjangoParser
+from django.http.multipartparser import MultiPartParserError
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+from foodgram.constants import IMAGE_SIGNATURES, MAX_IMAGE_UPLOAD_SIZE
+
+
+class InvalidImageUpload(Exception):
+    pass
+
+
+def is_image_header(header):
+    """Проверка сигнатуры файла по первым байтам."""
+    return header.startswith(IMAGE_SIGNATURES) or (
+        header[:4] == b'RIFF' and header[8:12] == b'WEBP'
+    )
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Пишет загружаемый файл сразу во временный файл по частям.
+    Сигнатура проверяется по первой части, размер - по мере загрузки,
+    поэтому в памяти одновременно лежит не больше одной части.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > MAX_IMAGE_UPLOAD_SIZE:
+            raise InvalidImageUpload('Файл слишком большой.')
+
+    def receive_data_chunk(self, raw_data, start):
+        if start == 0 and not is_image_header(raw_data[:12]):
+            raise InvalidImageUpload('Файл не является картинкой.')
+        if start + len(raw_data) > MAX_IMAGE_UPLOAD_SIZE:
+            raise InvalidImageUpload('Файл слишком большой.')
+        return super().receive_data_chunk(raw_data, start)
+
+
+class ImageUploadParser(MultiPartParser):
+    """multipart/form-data, где файлы идут только через ImageUploadHandler."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context['request']
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta['CONTENT_TYPE'] = media_type
+        try:
+            parser = DjangoParser(
+                meta, stream, [ImageUploadHandler(request)], encoding
+            )
+            data, files = parser.parse()
+        except InvalidImageUpload as error:
+            raise ParseError(str(error))
+        except MultiPartParserError as error:
+            raise ParseError(f'Ошибка разбора multipart: {error}')
+        return DataAndFiles(data, files)
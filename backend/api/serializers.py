@@ -2,13 +2,12 @@ from django.db import transaction
 from django.forms import ValidationError
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework.serializers import (
+    ImageField,
     IntegerField,
     ModelSerializer,
-    PrimaryKeyRelatedField,
     ReadOnlyField,
     SerializerMethodField,
 )
-from rest_framework.validators import UniqueTogetherValidator
 
 from foodgram.constants import (
     MAX_NUMBER_INGR,
@@ -23,7 +22,11 @@ from recipes.models import (
     ShoppingCart,
     Tag,
 )
-from users.models import Subscribed, User
+from recipes.services import sync_recipe_in_shopping_lists
+from users.models import User
+
+from .fields import BulkPrimaryKeyRelatedField, BulkRelatedListSerializer
+from .utils import get_recipes_limit
 
 
 class TagSerializer(ModelSerializer):
@@ -66,46 +69,16 @@ class RecipeIngredientSerializer(ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class BaseRelationSerializer(ModelSerializer):
-    """Базовый сериализатор для связей."""
-
-    def validate(self, attrs):
-        user = attrs['user']
-        recipe = attrs['recipe']
-
-        # Проверяем уникальность записи
-        if self.Meta.model.objects.filter(user=user, recipe=recipe).exists():
-            raise ValidationError('У вас уже есть эта запись')
-
-        return attrs
-
-    def to_representation(self, instance):
-        recipe = instance.recipe
-        return RecipeSerializer(recipe, context=self.context).data
-
-
-class FavoriteSerializer(BaseRelationSerializer):
-    """Сереалайзер избранного."""
-
-    class Meta:
-        model = Favorite
-        fields = ('user', 'recipe')
-
+class IngredientAmountListSerializer(BulkRelatedListSerializer):
+    """Ингредиенты рецепта разрешаются одним запросом."""
 
-class ShoppingCartSerializer(BaseRelationSerializer):
-    """Сериалайзер модели Cart."""
-
-    class Meta:
-        model = ShoppingCart
-        fields = ('user', 'recipe')
+    queryset = Ingredient.objects.all()
 
 
 class HowIngredientSerilizer(ModelSerializer):
     """Сереалайзер колличества ингредиентов в рецепте."""
 
-    id = PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
-    )
+    id = IntegerField()
     amount = IntegerField(
         min_value=MIN_VALUE_COUNT,
         max_value=MAX_NUMBER_INGR,
@@ -114,6 +87,7 @@ class HowIngredientSerilizer(ModelSerializer):
     class Meta:
         model = RecipeIngredient
         fields = ('id', 'amount')
+        list_serializer_class = IngredientAmountListSerializer
 
 
 class UserSerializer(ModelSerializer):
@@ -128,17 +102,35 @@ class UserSerializer(ModelSerializer):
             'username',
             'first_name',
             'last_name',
-            'is_subscribed'
+            'is_subscribed',
+            'recipes_count',
+            'followers_count',
         )
+        read_only_fields = ('recipes_count', 'followers_count')
 
     def get_is_subscribed(self, obj):
+        value = getattr(obj, 'is_subscribed', None)
+        if value is not None:
+            return value
         user = self.context.get('request').user
         return (
             user.is_authenticated
+            and obj.pk != user.pk
             and obj.following.filter(user=user).exists()
         )
 
 
+def get_for_response(recipe, context):
+    """
+    Рецепт для ответа после записи - через queryset представления,
+    с его prefetch и аннотациями, а не по запросу на каждый ингредиент.
+    """
+    view = context.get('view')
+    if view is None:
+        return recipe
+    return view.get_queryset().get(pk=recipe.pk)
+
+
 class RecipeListSerializer(ModelSerializer):
     """
     Serializer для модели Recipe - чтение данных.
@@ -156,31 +148,60 @@ class RecipeListSerializer(ModelSerializer):
         read_only=True)
     is_favorited = SerializerMethodField()
     is_in_shopping_cart = SerializerMethodField()
+    image_variants = SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image', 'text', 'cooking_time')
-
-    def get_is_favorited(self, obj):
+                  'name', 'image', 'image_variants', 'text', 'cooking_time',
+                  'favorites_count', 'in_carts_count')
+
+    def get_image_variants(self, obj):
+        """
+        Ссылки на уменьшенные копии картинки: {размер: {формат: url}}.
+        Пусто, пока копии для текущей картинки не построены.
+        """
+        variants = obj.image_variants
+        if variants.get('source') != obj.image.name:
+            return {}
+        storage = obj.image.storage
+        request = self.context.get('request')
+        return {
+            size: {
+                extension: (
+                    request.build_absolute_uri(storage.url(path))
+                    if request else storage.url(path)
+                )
+                for extension, path in paths.items()
+            }
+            for size, paths in variants.items()
+            if size != 'source'
+        }
+
+    def get_relation_flag(self, obj, flag, model):
+        """
+        Флаг связи рецепта с текущим пользователем.
+        Берётся из аннотации queryset, иначе запрашивается из базы.
+        """
+        value = getattr(obj, flag, None)
+        if value is not None:
+            return value
         request = self.context.get('request')
         return (
             request
             and request.user.is_authenticated
-            and Favorite.objects.filter(
+            and model.objects.filter(
                 user=request.user, recipe=obj.id
             ).exists()
         )
 
+    def get_is_favorited(self, obj):
+        return self.get_relation_flag(obj, 'is_favorited', Favorite)
+
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        return (
-            request
-            and request.user.is_authenticated
-            and ShoppingCart.objects.filter(
-                user=request.user, recipe=obj.id
-            ).exists()
+        return self.get_relation_flag(
+            obj, 'is_in_shopping_cart', ShoppingCart
         )
 
 
@@ -188,7 +209,9 @@ class RecipeCreateSerializer(ModelSerializer):
     """Serializer для модели Recipe - запись / обновление / удаление данных."""
 
     author = UserSerializer(read_only=True)
-    tags = PrimaryKeyRelatedField(many=True, queryset=Tag.objects.all())
+    tags = BulkPrimaryKeyRelatedField(
+        many=True, queryset=Tag.objects.all()
+    )
     cooking_time = IntegerField(
         min_value=MIN_VALUE_COUNT, max_value=MAX_VALUE_COUNT
     )
@@ -264,20 +287,84 @@ class RecipeCreateSerializer(ModelSerializer):
         self.add_ingredients_and_tags(tags, ingredients, recipe)
         return recipe
 
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        """
+        Приводит состав рецепта к ingredients, затрагивая только
+        удалённые, изменённые и новые строки.
+        Возвращает состав до изменения.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in RecipeIngredient.objects.filter(recipe=recipe).only(
+                'id', 'ingredient_id', 'amount'
+            )
+        }
+        amounts = {
+            ingredient['id'].id: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            RecipeIngredient.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = [
+            RecipeIngredient(id=item.id, amount=amounts[ingredient_id])
+            for ingredient_id, item in current.items()
+            if amounts.get(ingredient_id, item.amount) != item.amount
+        ]
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        )
+        return {
+            ingredient_id: item.amount
+            for ingredient_id, item in current.items()
+        }
+
+    @staticmethod
+    def update_tags(recipe, tags):
+        current = set(recipe.tags.values_list('id', flat=True))
+        new = {tag.id for tag in tags}
+        if current - new:
+            recipe.tags.remove(*(current - new))
+        if new - current:
+            recipe.tags.add(*(new - current))
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Редактирование рецепта."""
-        instance.ingredients.clear()
-        ingredients = validated_data.pop('ingredients')
-        instance.tags.clear()
-        tags = validated_data.pop('tags')
-        self.add_ingredients_and_tags(
-            tags, ingredients, instance
+        """Редактирование рецепта: меняются только различия."""
+        old_amounts = self.update_ingredients(
+            instance, validated_data.pop('ingredients')
         )
+        self.update_tags(instance, validated_data.pop('tags'))
+        sync_recipe_in_shopping_lists(instance, old_amounts)
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
         return RecipeListSerializer(
-            instance, context=self.context
+            get_for_response(instance, self.context), context=self.context
+        ).data
+
+
+class RecipeImageSerializer(ModelSerializer):
+    """Сериалайзер загрузки картинки рецепта файлом."""
+
+    image = ImageField()
+
+    class Meta:
+        model = Recipe
+        fields = ('image',)
+
+    def to_representation(self, instance):
+        return RecipeListSerializer(
+            get_for_response(instance, self.context), context=self.context
         ).data
 
 
@@ -285,68 +372,25 @@ class SubscribedSerializer(UserSerializer):
     """Сереалайзер Подписок. для GET запроса"""
 
     recipes = SerializerMethodField(method_name='get_recipes', read_only=True)
-    recipes_count = SerializerMethodField(
-        method_name='get_recipes_count', read_only=True
-    )
 
     class Meta(UserSerializer.Meta):
-        fields = UserSerializer.Meta.fields + (
-            'recipes',
-            'recipes_count',
-        )
-        read_only_fields = (
+        fields = UserSerializer.Meta.fields + ('recipes',)
+        read_only_fields = UserSerializer.Meta.read_only_fields + (
             'email',
             'username',
             'last_name',
             'first_name',
         )
 
-    def get_recipes_count(self, obj):
-        """Метод получения колличества рецепта."""
-        return obj.recipes.count()
-
     def get_recipes(self, object):
         """Метод получение рецепта."""
-        try:
-            limit = int(
-                self.context['request'].query_params.get(
-                    'recipes_limit'
-                )
-            )
-        except (ValueError, KeyError, AttributeError, TypeError):
-            limit = None
-        author_recipes = object.recipes.all()[:limit]
+        author_recipes = getattr(object, 'latest_recipes', None)
+        if author_recipes is None:
+            author_recipes = object.recipes.all()[
+                :get_recipes_limit(self.context.get('request'))
+            ]
         return RecipeSerializer(
             author_recipes,
             many=True,
             context=self.context,
         ).data
-
-
-class AddSubscribedSerializer(ModelSerializer):
-    """Сереалайзер добавления подписки."""
-
-    class Meta:
-        model = Subscribed
-        fields = ('user', 'author')
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Subscribed.objects.all(),
-                fields=['user', 'author'],
-                message='Вы уже подписались!',
-            )
-        ]
-
-    def validate(self, attrs):
-        user = attrs.get('user')
-        author = attrs.get('author')
-
-        if user == author:
-            raise ValidationError('Нельзя подписаться на самого себя!')
-
-        return attrs
-
-    def to_representation(self, instance):
-        return SubscribedSerializer(
-            instance.author, context=self.context
-        ).data
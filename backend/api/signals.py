@@ -0,0 +1,54 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.catalog import catalog_changed
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from users.models import User
+
+from .cache import invalidate_all, invalidate_recipes
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    invalidate_recipes(instance.pk)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    invalidate_recipes(instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_relations_changed(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_recipes(instance.pk)
+    elif pk_set:
+        invalidate_recipes(*pk_set)
+    else:
+        invalidate_all()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(catalog_changed)
+def catalog_rows_changed(sender, **kwargs):
+    """Массовые импорты сигналов моделей не шлют - ловим смену версии."""
+    invalidate_all()
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, update_fields, **kwargs):
+    """Вход пользователя обновляет только last_login - рецепты не меняются."""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_recipes(
+        *Recipe.objects.filter(author=instance).values_list('id', flat=True)
+    )
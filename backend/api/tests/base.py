@@ -0,0 +1,77 @@
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.cache import cache
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from recipes.models import Ingredient, Tag
+from users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def get_image_data():
+    buffer = BytesIO()
+    Image.new('RGB', (2, 2), 'red').save(buffer, 'PNG')
+    return (
+        'data:image/png;base64,'
+        + base64.b64encode(buffer.getvalue()).decode()
+    )
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    },
+)
+class FoodgramAPITestCase(APITestCase):
+    """Пользователь, тег и ингредиент для тестов API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='cook',
+            email='cook@example.com',
+            first_name='Иван',
+            last_name='Поваров',
+            password='secret-password',
+        )
+        cls.tag = Tag.objects.create(
+            name='Обед', color='#E26C2D', slug='lunch'
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='картофель', measurement_unit='г'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def create_recipe(self, name, text='Описание'):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/recipes/',
+            {
+                'name': name,
+                'text': text,
+                'cooking_time': 10,
+                'image': get_image_data(),
+                'tags': [self.tag.id],
+                'ingredients': [{'id': self.ingredient.id, 'amount': 100}],
+            },
+            format='json',
+        )
+        self.client.force_authenticate(None)
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
@@ -0,0 +1,26 @@
+from .base import FoodgramAPITestCase
+
+URL = '/api/tags/'
+
+
+class CatalogConditionalTest(FoodgramAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.etag = self.client.get(URL)['ETag']
+
+    def request_tags(self, if_none_match):
+        return self.client.get(URL, HTTP_IF_NONE_MATCH=if_none_match)
+
+    def test_strong_etag_matches(self):
+        self.assertEqual(self.request_tags(self.etag).status_code, 304)
+
+    def test_weak_etag_from_proxy_matches(self):
+        response = self.request_tags(f'W/{self.etag}')
+        self.assertEqual(response.status_code, 304)
+
+    def test_any_etag_matches(self):
+        self.assertEqual(self.request_tags('*').status_code, 304)
+
+    def test_other_etag_does_not_match(self):
+        self.assertEqual(self.request_tags('W/"other"').status_code, 200)
@@ -0,0 +1,28 @@
+from api.exporters import SHOPPING_CART_RENDERERS
+
+from .base import FoodgramAPITestCase
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class DownloadShoppingCartTest(FoodgramAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        recipe = self.create_recipe('Пюре')
+        self.client.force_authenticate(self.user)
+        self.client.post(f'/api/recipes/{recipe["id"]}/shopping_cart/')
+
+    def test_text_download(self):
+        response = self.client.get(URL, {'format': 'txt'})
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('- картофель (г) - 100', content)
+
+    def test_missing_pdf_font(self):
+        if 'pdf' not in SHOPPING_CART_RENDERERS:
+            self.skipTest('reportlab не установлен')
+        with self.settings(SHOPPING_CART_PDF_FONT='/nonexistent/font.ttf'):
+            response = self.client.get(URL, {'format': 'pdf'})
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.streaming)
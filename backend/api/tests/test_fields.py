@@ -0,0 +1,29 @@
+from .base import FoodgramAPITestCase
+
+
+class IngredientValidationTest(FoodgramAPITestCase):
+    """Ошибки по всем ингредиентам возвращаются одним ответом."""
+
+    def test_type_and_missing_id_errors_are_reported_together(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            '/api/recipes/',
+            {
+                'name': 'Суп',
+                'text': 'Описание',
+                'cooking_time': 10,
+                'tags': [self.tag.id],
+                'ingredients': [
+                    {'id': 'abc', 'amount': 10},
+                    {'id': 99999, 'amount': 10},
+                    {'id': self.ingredient.id, 'amount': 10},
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['ingredients']
+        self.assertEqual(len(errors), 3)
+        self.assertIn('id', errors[0])
+        self.assertIn('99999', str(errors[1]['id'][0]))
+        self.assertEqual(errors[2], {})
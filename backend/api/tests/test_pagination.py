@@ -0,0 +1,37 @@
+import json
+from base64 import urlsafe_b64encode
+
+from .base import FoodgramAPITestCase
+
+URL = '/api/recipes/'
+
+
+def make_cursor(position):
+    return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+class KeysetPaginationTest(FoodgramAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        for name in ('Суп', 'Каша', 'Рагу'):
+            self.create_recipe(name)
+
+    def test_cursor_walks_all_recipes(self):
+        names = []
+        response = self.client.get(URL, {'cursor': '', 'limit': 2})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            names += [recipe['name'] for recipe in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(names, ['Рагу', 'Каша', 'Суп'])
+
+    def test_cursor_with_wrong_value_type(self):
+        for position in (['x', 1], ['2020-01-01T00:00:00', 'x'], [None, 1]):
+            with self.subTest(position=position):
+                response = self.client.get(
+                    URL, {'cursor': make_cursor(position)}
+                )
+                self.assertEqual(response.status_code, 404)
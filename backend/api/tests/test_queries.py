@@ -0,0 +1,116 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+)
+from users.models import Subscribed, User
+
+from .base import FoodgramAPITestCase
+
+RECIPES_COUNT = 100
+UPDATE_QUERIES = 18
+
+
+class RecipeListQueriesTest(FoodgramAPITestCase):
+    """Число запросов списка рецептов не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        authors = [
+            User.objects.create_user(
+                username=f'author{index}',
+                email=f'author{index}@example.com',
+                first_name='Автор',
+                last_name=str(index),
+                password='secret-password',
+            )
+            for index in range(5)
+        ]
+        for index in range(RECIPES_COUNT):
+            recipe = Recipe.objects.create(
+                author=authors[index % len(authors)],
+                name=f'Рецепт {index}',
+                text='Описание',
+                cooking_time=10,
+                image='recipes/images/test.png',
+            )
+            recipe.tags.add(cls.tag)
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=cls.ingredient, amount=index + 1
+            )
+            if index % 2:
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+            if index % 3:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscribed.objects.create(user=cls.user, author=authors[0])
+
+    def count_queries(self, limit):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/recipes/', {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), limit)
+        return len(context.captured_queries)
+
+    def test_anonymous_list_queries_are_flat(self):
+        self.assertEqual(self.count_queries(6), self.count_queries(100))
+
+    def test_authenticated_list_queries_are_flat(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.count_queries(6), self.count_queries(100))
+
+
+class RecipeUpdateQueriesTest(FoodgramAPITestCase):
+    """Число запросов PATCH рецепта не зависит от числа ингредиентов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {index}', measurement_unit='г'
+            )
+            for index in range(40)
+        ]
+
+    def count_queries(self, size):
+        recipe = Recipe.objects.create(
+            author=self.user,
+            name=f'Рецепт {size}',
+            text='Описание',
+            cooking_time=10,
+            image='recipes/images/test.png',
+        )
+        recipe.tags.add(self.tag)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in self.ingredients[:size]
+        )
+        self.client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f'/api/recipes/{recipe.id}/',
+                {
+                    'name': f'Рецепт {size}',
+                    'text': 'Описание',
+                    'cooking_time': 10,
+                    'tags': [self.tag.id],
+                    'ingredients': [
+                        {'id': ingredient.id, 'amount': 2}
+                        for ingredient in self.ingredients[:size]
+                    ],
+                },
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data['ingredients']), size)
+        return len(context.captured_queries)
+
+    def test_update_queries_are_flat(self):
+        self.assertEqual(self.count_queries(5), UPDATE_QUERIES)
+        self.assertEqual(self.count_queries(40), UPDATE_QUERIES)
@@ -0,0 +1,108 @@
+from django.db.models.signals import pre_save
+
+from recipes.models import Favorite, Recipe, ShoppingListItem
+from recipes.services import add_to_favorite
+from users.models import User
+
+from .base import FoodgramAPITestCase
+
+
+class RelationToggleTest(FoodgramAPITestCase):
+    """Повторные добавления и удаления не сдвигают счётчики дважды."""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = Recipe.objects.get(pk=self.create_recipe('Суп')['id'])
+        self.client.force_authenticate(self.user)
+
+    def toggle(self, method, url):
+        return getattr(self.client, method)(url).status_code
+
+    def test_favorite_toggle(self):
+        url = f'/api/recipes/{self.recipe.id}/favorite/'
+        self.assertEqual(self.toggle('post', url), 201)
+        self.assertEqual(self.toggle('post', url), 400)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+        self.assertEqual(self.toggle('delete', url), 204)
+        self.assertEqual(self.toggle('delete', url), 400)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_shopping_cart_toggle(self):
+        url = f'/api/recipes/{self.recipe.id}/shopping_cart/'
+        self.assertEqual(self.toggle('post', url), 201)
+        self.assertEqual(self.toggle('post', url), 400)
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.user).total_amount, 100
+        )
+        self.assertEqual(self.toggle('delete', url), 204)
+        self.assertEqual(self.toggle('delete', url), 400)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.in_carts_count, 0)
+        self.assertFalse(ShoppingListItem.objects.filter(user=self.user))
+
+    def test_subscribe_toggle(self):
+        author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            first_name='Автор',
+            last_name='Авторов',
+            password='secret-password',
+        )
+        url = f'/api/users/{author.id}/subscribe/'
+        self.assertEqual(self.toggle('post', url), 201)
+        self.assertEqual(self.toggle('post', url), 400)
+        author.refresh_from_db()
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(self.toggle('delete', url), 204)
+        self.assertEqual(self.toggle('delete', url), 400)
+        author.refresh_from_db()
+        self.assertEqual(author.followers_count, 0)
+
+
+class CounterSaveTest(FoodgramAPITestCase):
+    """Сохранение объекта не затирает счётчики, сдвинутые параллельно."""
+
+    def setUp(self):
+        super().setUp()
+        self.recipe = Recipe.objects.get(pk=self.create_recipe('Суп')['id'])
+        self.client.force_authenticate(self.user)
+
+    def test_patch_keeps_favorites_count(self):
+        def add_favorite(sender, instance, **kwargs):
+            """Избранное появляется между чтением и сохранением рецепта."""
+            if not Favorite.objects.exists():
+                add_to_favorite(self.user.pk, instance.pk)
+
+        pre_save.connect(add_favorite, sender=Recipe)
+        self.addCleanup(pre_save.disconnect, add_favorite, sender=Recipe)
+        response = self.client.patch(
+            f'/api/recipes/{self.recipe.id}/',
+            {
+                'name': 'Новый суп',
+                'text': 'Описание',
+                'cooking_time': 5,
+                'tags': [self.tag.id],
+                'ingredients': [{'id': self.ingredient.id, 'amount': 50}],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+    def test_stale_instance_save_keeps_counters(self):
+        stale_recipe = Recipe.objects.get(pk=self.recipe.pk)
+        stale_user = User.objects.get(pk=self.user.pk)
+        self.client.post(f'/api/recipes/{self.recipe.id}/favorite/')
+        stale_recipe.name = 'Другой суп'
+        stale_recipe.save()
+        stale_user.first_name = 'Пётр'
+        stale_user.save()
+        self.recipe.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.recipe.name, 'Другой суп')
+        self.assertEqual(self.recipe.favorites_count, 1)
+        self.assertEqual(self.user.first_name, 'Пётр')
+        self.assertEqual(self.user.recipes_count, 1)
@@ -0,0 +1,32 @@
+from .base import FoodgramAPITestCase
+
+
+class RecipeSearchTest(FoodgramAPITestCase):
+
+    def test_created_recipe_is_found(self):
+        recipe = self.create_recipe('Суп гороховый', 'Сварить горох.')
+        self.create_recipe('Блины')
+        response = self.client.get('/api/recipes/', {'search': 'суп'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [recipe['id']],
+        )
+
+    def test_updated_recipe_is_found_by_new_name(self):
+        recipe = self.create_recipe('Блины')
+        self.client.force_authenticate(self.user)
+        response = self.client.patch(
+            f'/api/recipes/{recipe["id"]}/',
+            {
+                'name': 'Сырники',
+                'tags': [self.tag.id],
+                'ingredients': [{'id': self.ingredient.id, 'amount': 200}],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        response = self.client.get('/api/recipes/', {'search': 'сырники'})
+        self.assertEqual(response.data['count'], 1)
+        response = self.client.get('/api/recipes/', {'search': 'блины'})
+        self.assertEqual(response.data['count'], 0)
@@ -0,0 +1,57 @@
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from foodgram.constants import MAX_RECIPES_LIMIT, RECIPES_LIMIT
+from recipes.models import Recipe
+
+
+def get_recipes_limit(request):
+    """
+    Количество рецептов автора в выдаче подписок.
+    Берётся из recipes_limit и ограничивается сверху.
+    """
+    try:
+        limit = int(request.query_params.get('recipes_limit'))
+    except (ValueError, AttributeError, TypeError):
+        return RECIPES_LIMIT
+    return max(0, min(limit, MAX_RECIPES_LIMIT))
+
+
+def prefetch_latest_recipes(authors, limit):
+    """
+    Подгружает последние limit рецептов для каждого автора одним запросом.
+    Рецепты нумеруются ROW_NUMBER() в окне по автору,
+    наружу отдаются только первые limit строк каждого окна.
+    Результат складывается в атрибут latest_recipes.
+    """
+    authors = list(authors)
+    if not authors or not limit:
+        for author in authors:
+            author.latest_recipes = []
+        return authors
+    ranked = Recipe.objects.filter(
+        author__in=authors
+    ).only(
+        'id', 'name', 'image', 'cooking_time', 'author', 'pub_date'
+    ).annotate(
+        recipe_rank=Window(
+            expression=RowNumber(),
+            partition_by=F('author'),
+            order_by=(F('pub_date').desc(), F('id').desc()),
+        )
+    ).order_by()
+    sql, params = ranked.query.sql_with_params()
+    recipes = Recipe.objects.raw(
+        f'SELECT * FROM ({sql}) ranked '
+        'WHERE ranked.recipe_rank <= %s '
+        'ORDER BY ranked.author_id, ranked.recipe_rank',
+        (*params, limit),
+    )
+    recipes_by_author = defaultdict(list)
+    for recipe in recipes:
+        recipes_by_author[recipe.author_id].append(recipe)
+    for author in authors:
+        author.latest_recipes = recipes_by_author[author.pk]
+    return authors
@@ -1,11 +1,13 @@
-from datetime import datetime as dt
-
-from django.db.models import Sum
-from django.http import FileResponse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Exists, F, OuterRef, Prefetch, Value
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as NewUserViewSet
 from rest_framework import response, status
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import (
     AllowAny,
     IsAuthenticated,
@@ -15,33 +17,63 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
 from api.serializers import (
-    AddSubscribedSerializer,
-    FavoriteSerializer,
     IngredienSerializer,
     RecipeCreateSerializer,
+    RecipeImageSerializer,
     RecipeListSerializer,
-    ShoppingCartSerializer,
+    RecipeSerializer,
     SubscribedSerializer,
     TagSerializer,
     UserSerializer,
 )
-from foodgram.constants import FILE_NAME
+from foodgram.constants import FUZZY_SEARCH_MODE
 from recipes.models import (
     Favorite,
     Ingredient,
     Recipe,
     RecipeIngredient,
     ShoppingCart,
+    ShoppingListItem,
     Tag,
 )
+from recipes.search import ingredient_index, search_ingredients
+from recipes.services import (
+    add_relation,
+    add_to_favorite,
+    add_to_shopping_cart,
+    remove_from_favorite,
+    remove_from_shopping_cart,
+    remove_relation,
+)
 from users.models import Subscribed, User
 
+from .exporters import SHOPPING_CART_RENDERERS
 from .filters import IngredientSearchFilter, RecipeFilter
-from .pagination import LimitPageNumberPagination
+from .mixins import AnonymousResponseCacheMixin, CatalogConditionalMixin
+from .pagination import (
+    KeysetPagination,
+    LimitPageNumberPagination,
+    SubscriptionPagination,
+)
+from .parsers import ImageUploadParser
 from .permissions import IsOwnerOrAdminOrReadOnly
+from .utils import get_recipes_limit, prefetch_latest_recipes
+
+
+def annotate_is_subscribed(queryset, user):
+    """Аннотирует пользователей флагом подписки на них текущего юзера."""
+    if not user.is_authenticated:
+        return queryset.annotate(
+            is_subscribed=Value(False, output_field=BooleanField())
+        )
+    return queryset.annotate(
+        is_subscribed=Exists(
+            Subscribed.objects.filter(user=user, author=OuterRef('pk'))
+        )
+    )
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CatalogConditionalMixin, ReadOnlyModelViewSet):
     """Вьюсет тегов."""
 
     queryset = Tag.objects.all()
@@ -50,7 +82,7 @@ class TagViewSet(ReadOnlyModelViewSet):
     pagination_class = None
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(CatalogConditionalMixin, ReadOnlyModelViewSet):
     """Вьюсет ингридеентов."""
 
     queryset = Ingredient.objects.all()
@@ -60,78 +92,201 @@ class IngredientViewSet(ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientSearchFilter
 
+    def list(self, request, *args, **kwargs):
+        """Поиск по началу названия идёт по индексу в памяти, без базы."""
+        return self.conditional_response(
+            self.list_from_index, request, *args, **kwargs
+        )
+
+    def list_from_index(self, request, *args, **kwargs):
+        """
+        По умолчанию - поиск по началу названия.
+        С mode=fuzzy - ранжированный поиск по подстроке и с опечатками.
+        """
+        search = (
+            search_ingredients
+            if request.query_params.get('mode') == FUZZY_SEARCH_MODE
+            else ingredient_index.search
+        )
+        ingredients = search(
+            request.query_params.get('name', ''),
+            settings.INGREDIENT_SEARCH_LIMIT,
+        )
+        return Response(self.get_serializer(ingredients, many=True).data)
+
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(AnonymousResponseCacheMixin, ModelViewSet):
     """Вью сет для рецептов."""
 
-    queryset = Recipe.objects.all().select_related(
-        'author'
+    queryset = Recipe.objects.only(
+        'id',
+        'name',
+        'image',
+        'text',
+        'cooking_time',
+        'pub_date',
+        'author',
+        'image_variants',
+        'favorites_count',
+        'in_carts_count',
     ).prefetch_related(
-        'tags', 'ingredients'
+        Prefetch(
+            'tags',
+            queryset=Tag.objects.only('id', 'name', 'color', 'slug'),
+        ),
+        Prefetch(
+            'recipes',
+            queryset=RecipeIngredient.objects.select_related(
+                'ingredient'
+            ).only(
+                'id',
+                'recipe',
+                'amount',
+                'ingredient__id',
+                'ingredient__name',
+                'ingredient__measurement_unit',
+            ),
+        ),
     )
     permission_classes = (IsOwnerOrAdminOrReadOnly,)
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = RecipeFilter
-    pagination_class = LimitPageNumberPagination
+    ordering_fields = ('pub_date', 'favorites_count', 'in_carts_count')
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        """
+        Флаги is_favorited и is_in_shopping_cart считаются
+        подзапросами Exists в том же запросе, что и сами рецепты.
+        Авторы подгружаются одним запросом вместе с is_subscribed.
+        """
+        user = self.request.user
+        queryset = super().get_queryset().prefetch_related(
+            Prefetch(
+                'author',
+                queryset=annotate_is_subscribed(
+                    User.objects.only(
+                        'id',
+                        'email',
+                        'username',
+                        'first_name',
+                        'last_name',
+                        'recipes_count',
+                        'followers_count',
+                    ),
+                    user,
+                ),
+            )
+        )
+        if not user.is_authenticated:
+            return queryset.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(
+                    False, output_field=BooleanField()
+                ),
+            )
+        return queryset.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(
+                    user=user, recipe=OuterRef('pk')
+                )
+            ),
+        )
+
+    def get_renderers(self):
+        """Список покупок выгружается зарегистрированными рендерерами."""
+        if self.action == 'download_shopping_cart':
+            return [
+                renderer() for renderer in SHOPPING_CART_RENDERERS.values()
+            ]
+        return super().get_renderers()
 
     def get_serializer_class(self):
         """Метод определения сереолайзера."""
 
-        if self.action in ('list', 'retrieve'):
+        if self.action in ('list', 'retrieve', 'trending'):
             return RecipeListSerializer
         return RecipeCreateSerializer
 
     @staticmethod
-    def adding_recipe(add_serializer, model, request, recipe_id):
-        """Кастомный метод добавления и удаления рецепта."""
-        user = request.user
-        data = {'user': user.id, 'recipe': recipe_id}
-        serializer = add_serializer(data=data, context={'request': request})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+    @transaction.atomic
+    def adding_recipe(add, request, recipe_id):
+        """
+        Добавление рецепта в избранное или корзину.
+        add(user_id, recipe_id) вставляет связь одной командой
+        и возвращает False, если связь уже была.
+        """
+        recipe = get_object_or_404(
+            Recipe.objects.only('id', 'name', 'image', 'cooking_time'),
+            pk=recipe_id,
+        )
+        if not add(request.user.pk, recipe.pk):
+            return response.Response(
+                {'detail': 'У вас уже есть эта запись'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
         return response.Response(
-            serializer.data, status=status.HTTP_201_CREATED
+            RecipeSerializer(recipe, context={'request': request}).data,
+            status=status.HTTP_201_CREATED,
         )
 
     @staticmethod
-    def create_shopping_cart_file(self, request, ingredients):
-        """Кастомный метод создания списка покупок."""
-        user = self.request.user
-        filename = f'{user.username}_{FILE_NAME}'
-        today = dt.today()
-        shopping_list = (
-            f'Список покупок для пользователя: {user.username}\n\n'
-            f'Дата: {today:%Y-%m-%d}\n\n'
-        )
-        shopping_list += '\n'.join(
-            [
-                f'- {ingredient["ingredient__name"]} '
-                f'({ingredient["ingredient__measurement_unit"]})'
-                f' - {ingredient["amount"]}'
-                for ingredient in ingredients
-            ]
+    @transaction.atomic
+    def removing_recipe(remove, request, recipe_id):
+        """
+        Удаление рецепта из избранного или корзины.
+        remove(user_id, recipe_id) удаляет связь одной командой
+        и возвращает False, если удалять было нечего.
+        """
+        if remove(request.user.pk, recipe_id):
+            return response.Response(status=status.HTTP_204_NO_CONTENT)
+        return response.Response(status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=True, methods=['put'], parser_classes=(ImageUploadParser,))
+    def image(self, request, pk):
+        """
+        Загрузка картинки рецепта файлом в multipart/form-data.
+        Файл пишется на диск по частям, без base64 в JSON.
+        """
+        recipe = self.get_object()
+        serializer = RecipeImageSerializer(
+            recipe, data=request.data, context=self.get_serializer_context()
         )
-        shopping_list += f'\n\nFoodgram ({today:%Y})'
-        response = FileResponse(
-            shopping_list, content_type='text.txt; charset=utf-8'
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """
+        Популярные рецепты по заранее посчитанному RecipeScore.
+        Рецепты без рейтинга в выдачу не попадают.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).annotate(
+            trending_score=F('score__score')
+        ).filter(trending_score__isnull=False).order_by(
+            '-trending_score', '-id'
         )
-        response['Content-Disposition'] = f'attachment; filename={filename}'
-        return response
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.get_serializer(page, many=True).data
+            )
+        return Response(self.get_serializer(queryset, many=True).data)
 
     @action(
         detail=True, methods=['post'], permission_classes=(IsAuthenticated,)
     )
     def favorite(self, request, pk):
-        return self.adding_recipe(FavoriteSerializer, Favorite, request, pk)
+        return self.adding_recipe(add_to_favorite, request, pk)
 
     @favorite.mapping.delete
     def remove_from_favorite(self, request, pk):
         """Метод удаления избраного."""
-        favorite = Favorite.objects.filter(user=request.user, recipe=pk)
-        if favorite.exists():
-            favorite.delete()
-            return response.Response(status=status.HTTP_204_NO_CONTENT)
-        return response.Response(status=status.HTTP_400_BAD_REQUEST)
+        return self.removing_recipe(remove_from_favorite, request, pk)
 
     @action(
         detail=True,
@@ -141,20 +296,14 @@ class RecipeViewSet(ModelViewSet):
     )
     def shopping_cart(self, request, pk):
         """Метод добавления рецепта в корзину."""
-        return self.adding_recipe(
-            ShoppingCartSerializer, ShoppingCart, request, pk
-        )
+        return self.adding_recipe(add_to_shopping_cart, request, pk)
 
     @shopping_cart.mapping.delete
     def remove_from_shopping_cart(self, request, pk):
         """Метод удаления из корзины."""
-        delete_shop_cart = ShoppingCart.objects.filter(
-            user=request.user, recipe=pk
+        return self.removing_recipe(
+            remove_from_shopping_cart, request, pk
         )
-        if delete_shop_cart.exists():
-            delete_shop_cart.delete()
-            return response.Response(status=status.HTTP_204_NO_CONTENT)
-        return response.Response(status=status.HTTP_400_BAD_REQUEST)
 
     @action(
         detail=False, methods=['get'], permission_classes=(IsAuthenticated,)
@@ -162,14 +311,24 @@ class RecipeViewSet(ModelViewSet):
     def download_shopping_cart(self, request):
         """Метод получения списка покупок."""
         ingredients = (
-            RecipeIngredient.objects.filter(
-                recipe__shoppingcart__user=self.request.user
+            ShoppingListItem.objects.filter(user=request.user)
+            .values(
+                'ingredient__name',
+                'ingredient__measurement_unit',
+                amount=F('total_amount'),
             )
-            .values('ingredient__name', 'ingredient__measurement_unit')
             .order_by('ingredient__name')
-            .annotate(amount=Sum('amount'))
         )
-        return self.create_shopping_cart_file(self, request, ingredients)
+        renderer = request.accepted_renderer
+        renderer.prepare()
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients.iterator(), request.user),
+            content_type=renderer.get_content_type(),
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename={renderer.get_filename(request.user)}'
+        )
+        return response
 
 
 class UserViewSet(NewUserViewSet):
@@ -177,6 +336,13 @@ class UserViewSet(NewUserViewSet):
     permission_classes = (IsAuthenticatedOrReadOnly,)
     serializer_class = UserSerializer
     pagination_class = LimitPageNumberPagination
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    ordering_fields = ('recipes_count', 'followers_count')
+
+    def get_queryset(self):
+        return annotate_is_subscribed(
+            super().get_queryset(), self.request.user
+        )
 
     def get_permissions(self):
         if self.action == 'me':
@@ -184,19 +350,25 @@ class UserViewSet(NewUserViewSet):
         return super().get_permissions()
 
     @action(
-        detail=False, methods=['get'], permission_classes=(IsAuthenticated,)
+        detail=False,
+        methods=['get'],
+        permission_classes=(IsAuthenticated,),
+        pagination_class=SubscriptionPagination,
     )
     def subscriptions(self, request):
         """Возвращает пользователей, на которых подписан текущий пользователь.
         В выдачу добавляются рецепты.
         """
+        queryset = annotate_is_subscribed(
+            User.objects.filter(following__user=request.user),
+            request.user,
+        )
+        page = prefetch_latest_recipes(
+            self.paginate_queryset(queryset), get_recipes_limit(request)
+        )
         return self.get_paginated_response(
             SubscribedSerializer(
-                self.paginate_queryset(
-                    User.objects.filter(
-                        following__user=request.user
-                    )
-                ),
+                page,
                 many=True,
                 context={'request': request},
             ).data
@@ -208,27 +380,35 @@ class UserViewSet(NewUserViewSet):
     def subscribe(self, request, id):
         """Подписываем пользователя.
             Доступно только авторизованным пользователям."""
-        user = request.user
-        data = {'user': user.id, 'author': id}
-        serializer = AddSubscribedSerializer(
-            data=data, context={'request': request}
-        )
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        author = get_object_or_404(User, pk=id)
+        if author == request.user:
+            return Response(
+                {'detail': 'Нельзя подписаться на самого себя!'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        with transaction.atomic():
+            added = add_relation(
+                Subscribed, user=request.user.pk, author=author.pk
+            )
+        if not added:
+            return Response(
+                {'detail': 'Вы уже подписались!'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        author.followers_count += 1
         return response.Response(
-            serializer.data,
+            SubscribedSerializer(author, context={'request': request}).data,
             status=status.HTTP_201_CREATED,
         )
 
     @subscribe.mapping.delete
     def delete_subscribe(self, request, id):
         """Отписываемся от пользователя."""
-        subscribed_user = Subscribed.objects.filter(
-            user=request.user,
-            author=id,
-        )
-        if subscribed_user.exists():
-            subscribed_user.delete()
+        with transaction.atomic():
+            removed = remove_relation(
+                Subscribed, user=request.user.pk, author=id
+            )
+        if removed:
             return Response(
                 {'detail': 'Отписались от пользователя'},
                 status=status.HTTP_204_NO_CONTENT
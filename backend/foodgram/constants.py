@@ -3,7 +3,7 @@ MAX_NUMBER_INGR = 30000
 MIN_VALUE_COUNT = 1
 MAX_VALUE_COUNT = 360
 DEFAULT_COLOR = '#ffd057'
-FILE_NAME = 'shopping_cart.txt'
+FILE_NAME = 'shopping_cart'
 DIRICTORY_PATH = 'recipe_img/'
 MIN_INGREDIENT = (f'Количество ингредиентов не может быть меньше '
                   f'{MIN_VALUE_COUNT}')
@@ -16,3 +16,45 @@ MAX_LENGTH_COLOR = 7
 MAX_VALUE_LENGTH_USER = 150
 PAGE_SIZE = 6
 MAX_AMOUNT = 30000
+RECIPES_LIMIT = 3
+MAX_RECIPES_LIMIT = 50
+EXPORT_CHUNK_SIZE = 64 * 1024
+PDF_SPOOL_SIZE = 1024 * 1024
+PDF_FONT_NAME = 'ShoppingCartFont'
+PDF_FONT_SIZE = 12
+PDF_LINE_HEIGHT = 18
+PDF_MARGIN = 40
+CATALOG_MAX_AGE = 60
+RECIPE_CACHE_TIMEOUT = 60 * 60
+SEARCH_CONFIG = 'russian'
+INGREDIENT_INDEX_TTL = 60 * 60
+TRIGRAM_THRESHOLD = 0.3
+FUZZY_SEARCH_MODE = 'fuzzy'
+IMAGE_VARIANT_SIZES = {
+    'small': (160, 120),
+    'medium': (480, 360),
+    'large': (960, 720),
+}
+IMAGE_VARIANT_FORMATS = (('JPEG', 'jpg'), ('WEBP', 'webp'))
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_VARIANTS_PATH = f'{DIRICTORY_PATH}variants/'
+MAX_IMAGE_UPLOAD_SIZE = 20 * 1024 * 1024
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',
+    b'\x89PNG\r\n\x1a\n',
+    b'GIF87a',
+    b'GIF89a',
+)
+MAX_LENGTH_STATUS = 16
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_ERRORS = 100
+IMPORT_POLL_INTERVAL = 2000
+IMPORT_STALE_TIMEOUT = 60 * 60
+TRENDING_HALF_LIFE = 60 * 60 * 24 * 3
+TRENDING_FAVORITE_WEIGHT = 2.0
+TRENDING_CART_WEIGHT = 1.0
+TRENDING_MIN_SCORE = 0.01
+TRENDING_BATCH_SIZE = 100000
+TRENDING_LOCK_TIMEOUT = 60 * 60
+TRENDING_SAFETY_LAG = 60 * 5
+TRENDING_LOOKUP_SIZE = 10000
@@ -0,0 +1,36 @@
+class CounterFieldsMixin:
+    """
+    Модель с денормализованными счётчиками counter_fields.
+    Счётчики меняются только UPDATE ... SET x = x + 1, поэтому save()
+    уже существующего объекта их не записывает: иначе значение,
+    прочитанное вместе с объектом, затёрло бы параллельные приращения.
+    """
+
+    counter_fields = ()
+
+    def save(
+        self,
+        force_insert=False,
+        force_update=False,
+        using=None,
+        update_fields=None,
+    ):
+        if not self._state.adding and not force_insert:
+            if update_fields is None:
+                deferred = self.get_deferred_fields()
+                update_fields = [
+                    field.attname
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and field.attname not in deferred
+                ]
+            update_fields = [
+                name for name in update_fields
+                if name not in self.counter_fields
+            ]
+        return super().save(
+            force_insert=force_insert,
+            force_update=force_update,
+            using=using,
+            update_fields=update_fields,
+        )
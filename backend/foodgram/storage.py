@@ -0,0 +1,62 @@
+import hashlib
+import os
+from uuid import uuid4
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файлы именуются по SHA-256 содержимого: <каталог>/<ab>/<хэш>.<расш>.
+    Одинаковые загрузки ложатся в один файл, а содержимое по имени
+    никогда не меняется, поэтому его можно кэшировать навсегда.
+    """
+
+    def get_hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        content_hash = digest.hexdigest()
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            directory, content_hash[:2], f'{content_hash}{extension}'
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_hashed_name(name, content)
+        try:
+            # Свежая mtime защищает файл от сборщика мусора (--min-age),
+            # пока на него не сослалась база.
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return super().save(name, content, max_length=max_length)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        """Имя по хэшу уже однозначно - суффиксы не добавляются."""
+        return name
+
+    def _save(self, name, content):
+        """
+        Содержимое пишется во временный файл и публикуется через
+        os.link: ссылка создаётся атомарно и только если файла ещё нет.
+        Если параллельная загрузка того же содержимого успела первой,
+        используется её файл.
+        """
+        temp_name = super()._save(f'{name}.{uuid4().hex}.tmp', content)
+        temp_path = self.path(temp_name)
+        try:
+            os.link(temp_path, self.path(name))
+        except FileExistsError:
+            os.utime(self.path(name))
+        finally:
+            os.remove(temp_path)
+        return name
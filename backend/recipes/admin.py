@@ -1,59 +1,108 @@
-import csv
-
 from django.contrib import admin, messages
-from django.http import HttpResponseRedirect
-from django.shortcuts import render
+from django.db.models import Prefetch
+from django.http import HttpResponseRedirect, JsonResponse
+from django.shortcuts import get_object_or_404, render
 from django.urls import path, reverse
 from django.utils.safestring import mark_safe
 
+from foodgram.constants import IMPORT_POLL_INTERVAL
+
 from .forms import IngredientImportForm, TagImportForm
+from .imports import fail_stale_imports, schedule_import
 from .models import (
     Favorite,
+    ImportIngredient,
     Ingredient,
     Recipe,
     RecipeIngredient,
     ShoppingCart,
     Tag,
 )
+from .services import get_recipe_amounts, sync_recipe_in_shopping_lists
 
 
-class IngredientAdmin(admin.ModelAdmin):
-    """Админка ингридиентов"""
+class CSVImportMixin:
+    """
+    Импорт CSV из админки.
+    Файл обрабатывается в фоне, ход импорта виден на отдельной странице.
+    """
 
-    model = Ingredient
-    list_display = ('pk', 'name', 'measurement_unit')
-    search_fields = ('name', 'measurement_unit')
+    import_form = None
+    import_kind = None
+
+    def get_import_url_name(self, suffix):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return '%s_%s_%s' % (*info, suffix)
 
     def get_urls(self):
         urls = super().get_urls()
-        urls.insert(-1, path('csv-upload/', self.upload_csv))
-        return urls
+        wrap = self.admin_site.admin_view
+        return [
+            path(
+                'csv-upload/',
+                wrap(self.upload_csv),
+                name=self.get_import_url_name('csv_upload'),
+            ),
+            path(
+                'csv-upload/<int:pk>/',
+                wrap(self.import_page),
+                name=self.get_import_url_name('csv_import'),
+            ),
+            path(
+                'csv-upload/<int:pk>/status/',
+                wrap(self.import_status),
+                name=self.get_import_url_name('csv_import_status'),
+            ),
+        ] + urls
 
     def upload_csv(self, request):
-        if request.method == 'POST':
-            form = IngredientImportForm(request.POST, request.FILES)
-            if form.is_valid():
-                form_object = form.save()
-                with open(
-                    form_object.csv_file.path, encoding='utf-8'
-                ) as csv_file:
-                    rows = csv.reader(csv_file, delimiter=',')
-                    if next(rows) != ['name', 'measurement_unit']:
-                        messages.warning(request, 'Неверные заголовки у файла')
-                        return HttpResponseRedirect(request.path_info)
-                    Ingredient.objects.bulk_create(
-                        Ingredient(
-                            name=row[0],
-                            measurement_unit=row[1],
-                        )
-                        for row in rows
-                    )
-                url = reverse('admin:index')
-                messages.success(request, 'Файл успешно импортирован')
-                return HttpResponseRedirect(url)
-        form = IngredientImportForm()
+        form = self.import_form(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            form_object = form.save()
+            schedule_import(form_object, self.import_kind)
+            messages.success(request, 'Файл загружен, импорт запущен')
+            return HttpResponseRedirect(reverse(
+                f'admin:{self.get_import_url_name("csv_import")}',
+                args=(form_object.pk,),
+            ))
         return render(request, 'admin/csv_import_page.html', {'form': form})
 
+    def import_page(self, request, pk):
+        return render(request, 'admin/csv_import_status.html', {
+            'job': get_object_or_404(ImportIngredient, pk=pk),
+            'status_url': reverse(
+                f'admin:{self.get_import_url_name("csv_import_status")}',
+                args=(pk,),
+            ),
+            'poll_interval': IMPORT_POLL_INTERVAL,
+        })
+
+    def import_status(self, request, pk):
+        fail_stale_imports(ImportIngredient.objects.filter(pk=pk))
+        job = get_object_or_404(ImportIngredient, pk=pk)
+        return JsonResponse({
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'total_rows': job.total_rows,
+            'processed_rows': job.processed_rows,
+            'inserted_rows': job.inserted_rows,
+            'updated_rows': job.updated_rows,
+            'skipped_rows': job.skipped_rows,
+            'error_rows': job.error_rows,
+            'errors': job.errors,
+            'finished': job.finished_at is not None,
+        })
+
+
+class IngredientAdmin(CSVImportMixin, admin.ModelAdmin):
+    """Админка ингридиентов"""
+
+    model = Ingredient
+    list_display = ('pk', 'name', 'measurement_unit')
+    search_fields = ('name', 'measurement_unit')
+    import_form = IngredientImportForm
+    import_kind = 'ingredient'
+
 
 class IngredientsInline(admin.TabularInline):
     """
@@ -63,6 +112,7 @@ class IngredientsInline(admin.TabularInline):
     model = RecipeIngredient
     min_num = 1
     extra = 3
+    autocomplete_fields = ('ingredient',)
 
 
 class FavouriteAdmin(admin.ModelAdmin):
@@ -70,7 +120,9 @@ class FavouriteAdmin(admin.ModelAdmin):
     Админ-зона избранных рецептов.
     """
     list_display = ('pk', 'user', 'recipe')
-    list_editable = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
 
 
 @admin.register(ShoppingCart)
@@ -79,7 +131,9 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     Админ-зона покупок.
     """
     list_display = ('pk', 'user', 'recipe')
-    list_editable = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
 
 
 class IngredientRecipeAdmin(admin.ModelAdmin):
@@ -87,8 +141,9 @@ class IngredientRecipeAdmin(admin.ModelAdmin):
     Админ-зона ингридентов для рецептов.
     """
     list_display = ('id', 'recipe', 'ingredient', 'amount',)
-    list_filter = ('recipe', 'ingredient')
-    search_fields = ('name',)
+    list_select_related = ('recipe', 'ingredient')
+    autocomplete_fields = ('recipe', 'ingredient')
+    search_fields = ('recipe__name', 'ingredient__name')
 
 
 class RecipeAdmin(admin.ModelAdmin):
@@ -100,20 +155,33 @@ class RecipeAdmin(admin.ModelAdmin):
         'id',
         'author',
         'name',
-        'in_favorite',
+        'favorites_count',
+        'in_carts_count',
         'get_ingredients',
         'get_image',
     )
     fields = ('name', 'author', 'text', 'image', 'tags')
-    search_fields = ('name', 'author', 'tags')
-    list_filter = ('name', 'author', 'tags')
+    search_fields = ('name', 'author__username', 'author__email')
+    list_filter = ('tags',)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author',)
     inlines = (IngredientsInline,)
     empty_value_display = '- пусто -'
     filter_horizontal = ('tags',)
+    list_select_related = ('author',)
 
-    @admin.display(description='Избранное')
-    def in_favorite(self, obj):
-        return obj.favorite.all().count()
+    def get_queryset(self, request):
+        """Ингредиенты для списка - одним запросом на страницу."""
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('ingredients', queryset=Ingredient.objects.only('name'))
+        )
+
+    def save_related(self, request, form, formsets, change):
+        """Изменения состава рецепта переносятся в списки покупок."""
+        old_amounts = get_recipe_amounts(form.instance) if change else {}
+        super().save_related(request, form, formsets, change)
+        if change:
+            sync_recipe_in_shopping_lists(form.instance, old_amounts)
 
     @admin.display(description='Ингредиенты')
     def get_ingredients(self, obj):
@@ -126,7 +194,7 @@ class RecipeAdmin(admin.ModelAdmin):
         return mark_safe(f'<img src={obj.image.url} width="80" height="60">')
 
 
-class TagAdmin(admin.ModelAdmin):
+class TagAdmin(CSVImportMixin, admin.ModelAdmin):
     """
     Админ-зона тегов.
     """
@@ -134,37 +202,8 @@ class TagAdmin(admin.ModelAdmin):
     list_display = ('name', 'color', 'slug')
     list_editable = ('color',)
     empty_value_display = '-пусто-'
-
-    def get_urls(self):
-        urls = super().get_urls()
-        urls.insert(-1, path('csv-upload/', self.upload_csv))
-        return urls
-
-    def upload_csv(self, request):
-        if request.method == 'POST':
-            form = TagImportForm(request.POST, request.FILES)
-            if form.is_valid():
-                form_object = form.save()
-                with open(
-                    form_object.csv_file.path, encoding='utf-8'
-                ) as csv_file:
-                    rows = csv.reader(csv_file, delimiter=',')
-                    if next(rows) != ['name', 'color', 'slug']:
-                        messages.warning(request, 'Неверные заголовки у файла')
-                        return HttpResponseRedirect(request.path_info)
-                    Tag.objects.bulk_create(
-                        Tag(
-                            name=row[0],
-                            color=row[1],
-                            slug=row[2]
-                        )
-                        for row in rows
-                    )
-                url = reverse('admin:index')
-                messages.success(request, 'Файл успешно импортирован')
-                return HttpResponseRedirect(url)
-        form = TagImportForm()
-        return render(request, 'admin/csv_import_page.html', {'form': form})
+    import_form = TagImportForm
+    import_kind = 'tag'
 
 
 admin.site.register(Recipe, RecipeAdmin)
@@ -0,0 +1,40 @@
+import time
+from collections import namedtuple
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.dispatch import Signal
+
+CATALOG_VERSION_KEY = 'catalog_version:{}'
+
+CatalogVersion = namedtuple('CatalogVersion', ('token', 'modified'))
+
+# Отправляется при каждой смене версии справочника, sender - модель.
+catalog_changed = Signal()
+
+
+def get_catalog_key(model):
+    return CATALOG_VERSION_KEY.format(model._meta.label_lower)
+
+
+def bump_catalog_version(model):
+    """
+    Меняет версию справочника (теги, ингредиенты).
+    Вызывается при любом изменении строк, в том числе при массовом импорте.
+    """
+    cache.set(
+        get_catalog_key(model),
+        CatalogVersion(uuid4().hex, int(time.time())),
+        None,
+    )
+    catalog_changed.send(sender=model)
+
+
+def get_catalog_version(model):
+    """Текущая версия справочника, общая для всех процессов."""
+    key = get_catalog_key(model)
+    version = cache.get(key)
+    if version is not None:
+        return version
+    cache.add(key, CatalogVersion(uuid4().hex, int(time.time())), None)
+    return cache.get(key)
@@ -0,0 +1,96 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from foodgram.constants import (
+    IMAGE_VARIANT_FORMATS,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANT_SIZES,
+    IMAGE_VARIANTS_PATH,
+)
+
+from .models import Recipe
+from .workers import submit_on_commit
+
+logger = logging.getLogger(__name__)
+
+
+def render_variants(image, storage, source_name):
+    """
+    Сохраняет уменьшенные копии картинки во всех размерах и форматах.
+    Формат, который Pillow не смог закодировать (например, сборка
+    без WEBP), пропускается - остальные копии сохраняются.
+    Возвращает {размер: {расширение: путь}}.
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    stem = os.path.splitext(os.path.basename(source_name))[0]
+    variants = {}
+    for size_name, size in IMAGE_VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        for image_format, extension in IMAGE_VARIANT_FORMATS:
+            buffer = BytesIO()
+            try:
+                resized.save(
+                    buffer,
+                    image_format,
+                    quality=IMAGE_VARIANT_QUALITY,
+                    optimize=True,
+                )
+            except (KeyError, OSError, ValueError):
+                logger.warning(
+                    'Не удалось сохранить %s в формате %s',
+                    source_name,
+                    image_format,
+                    exc_info=True,
+                )
+                continue
+            variants.setdefault(size_name, {})[extension] = storage.save(
+                f'{IMAGE_VARIANTS_PATH}{stem}_{size_name}.{extension}',
+                ContentFile(buffer.getvalue()),
+            )
+    return variants
+
+
+def build_recipe_variants(recipe_id, source_name):
+    """Строит копии картинки рецепта, если её не успели заменить."""
+    try:
+        storage = Recipe._meta.get_field('image').storage
+        with storage.open(source_name) as source, Image.open(source) as image:
+            variants = render_variants(image, storage, source_name)
+        recipe = Recipe.objects.filter(
+            pk=recipe_id, image=source_name
+        ).first()
+        if recipe is None:
+            return
+        recipe.image_variants = {'source': source_name, **variants}
+        recipe.save(update_fields=('image_variants',))
+    except Exception:
+        logger.exception(
+            'Не удалось обработать картинку %s рецепта %s',
+            source_name,
+            recipe_id,
+        )
+
+
+def schedule_recipe_variants(recipe):
+    """
+    Ставит обработку картинки в очередь после фиксации транзакции,
+    если варианты ещё не построены для текущего файла.
+    """
+    source_name = recipe.image.name
+    if not source_name or recipe.image_variants.get('source') == source_name:
+        return
+    submit_on_commit(
+        'recipe-images',
+        settings.IMAGE_WORKERS,
+        build_recipe_variants,
+        recipe.pk,
+        source_name,
+    )
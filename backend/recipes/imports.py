@@ -0,0 +1,170 @@
+import csv
+import logging
+import re
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from foodgram.constants import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_STALE_TIMEOUT,
+    MAX_IMPORT_ERRORS,
+    MAX_LENGTH,
+)
+
+from .catalog import bump_catalog_version
+from .loaders import iter_batches, upsert_ingredients, upsert_tags
+from .models import ImportIngredient, Ingredient, Tag
+from .workers import submit_on_commit
+
+logger = logging.getLogger(__name__)
+
+STALE_IMPORT_ERROR = 'Импорт прерван: обработчик был перезапущен'
+
+COLOR_RE = re.compile(r'^#[0-9a-fA-F]{6}$')
+
+Importer = namedtuple('Importer', ('header', 'upsert', 'model', 'checks'))
+
+IMPORTERS = {
+    'ingredient': Importer(
+        header=('name', 'measurement_unit'),
+        upsert=upsert_ingredients,
+        model=Ingredient,
+        checks={},
+    ),
+    'tag': Importer(
+        header=('name', 'color', 'slug'),
+        upsert=upsert_tags,
+        model=Tag,
+        checks={'color': COLOR_RE.match},
+    ),
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+def count_rows(path):
+    """Количество строк данных - для прогресса, без разбора CSV."""
+    lines = 0
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b''):
+            lines += chunk.count(b'\n')
+    return max(lines - 1, 0)
+
+
+def parse_row(row, importer):
+    if len(row) != len(importer.header):
+        raise RowError(f'Ожидалось колонок: {len(importer.header)}')
+    record = dict(zip(importer.header, (value.strip() for value in row)))
+    for field, value in record.items():
+        if not value:
+            raise RowError(f'Пустое значение в колонке {field}')
+        if len(value) > MAX_LENGTH:
+            raise RowError(f'Слишком длинное значение в колонке {field}')
+        check = importer.checks.get(field)
+        if check and not check(value):
+            raise RowError(f'Неверное значение в колонке {field}')
+    return record
+
+
+def run_import(import_id, kind):
+    """
+    Фоновый импорт CSV пачками по IMPORT_BATCH_SIZE строк.
+    Дубликаты пропускаются, ошибочные строки собираются в errors,
+    после каждой пачки в записи импорта обновляется прогресс.
+    Импорт, уже признанный прерванным, повторно не запускается.
+    """
+    importer = IMPORTERS[kind]
+    jobs = ImportIngredient.objects.filter(pk=import_id)
+    job = jobs.get()
+    stats = Counter()
+    errors = []
+    started = jobs.filter(status=ImportIngredient.PENDING).update(
+        status=ImportIngredient.RUNNING,
+        total_rows=count_rows(job.csv_file.path),
+        updated_at=timezone.now(),
+    )
+    if not started:
+        return
+    try:
+        with open(job.csv_file.path, encoding='utf-8', newline='') as file:
+            rows = csv.reader(file)
+            header = tuple(column.strip() for column in next(rows, ()))
+            if header != importer.header:
+                raise RowError('Неверные заголовки у файла')
+            for batch in iter_batches(
+                enumerate(rows, start=2), IMPORT_BATCH_SIZE
+            ):
+                records = []
+                for line, row in batch:
+                    try:
+                        records.append(parse_row(row, importer))
+                    except RowError as error:
+                        stats['error'] += 1
+                        if len(errors) < MAX_IMPORT_ERRORS:
+                            errors.append({'row': line, 'error': str(error)})
+                with transaction.atomic():
+                    written = importer.upsert(records)
+                stats['inserted'] += written['inserted']
+                stats['updated'] += written['updated']
+                stats['skipped'] += (
+                    len(records) - written['inserted'] - written['updated']
+                )
+                stats['processed'] += len(batch)
+                jobs.update(
+                    processed_rows=stats['processed'],
+                    inserted_rows=stats['inserted'],
+                    updated_rows=stats['updated'],
+                    skipped_rows=stats['skipped'],
+                    error_rows=stats['error'],
+                    errors=errors,
+                    updated_at=timezone.now(),
+                )
+        status = ImportIngredient.DONE
+    except (RowError, UnicodeDecodeError, csv.Error) as error:
+        errors.append({'row': None, 'error': str(error)})
+        status = ImportIngredient.FAILED
+    except Exception:
+        logger.exception('Импорт %s завершился с ошибкой', import_id)
+        errors.append({'row': None, 'error': 'Внутренняя ошибка импорта'})
+        status = ImportIngredient.FAILED
+    now = timezone.now()
+    jobs.update(
+        status=status, errors=errors, finished_at=now, updated_at=now
+    )
+    if stats['inserted'] or stats['updated']:
+        bump_catalog_version(importer.model)
+
+
+def fail_stale_imports(jobs=None):
+    """
+    Помечает ошибкой импорты, которые не обновлялись дольше
+    IMPORT_STALE_TIMEOUT: задачи пула живут только в памяти процесса
+    и теряются при его перезапуске. Возвращает число таких импортов.
+    """
+    if jobs is None:
+        jobs = ImportIngredient.objects.all()
+    now = timezone.now()
+    stale = jobs.filter(
+        status__in=(ImportIngredient.PENDING, ImportIngredient.RUNNING),
+        updated_at__lt=now - timedelta(seconds=IMPORT_STALE_TIMEOUT),
+    ).only('id', 'status', 'errors')
+    failed = 0
+    for job in stale:
+        failed += ImportIngredient.objects.filter(
+            pk=job.pk, status=job.status, updated_at__lt=now
+        ).update(
+            status=ImportIngredient.FAILED,
+            errors=job.errors + [{'row': None, 'error': STALE_IMPORT_ERROR}],
+            finished_at=now,
+            updated_at=now,
+        )
+    return failed
+
+
+def schedule_import(job, kind):
+    submit_on_commit('csv-import', 1, run_import, job.pk, kind)
@@ -0,0 +1,179 @@
+import csv
+import json
+import os
+from collections import Counter
+from itertools import islice
+
+from django.db.models import Q
+
+from .models import Ingredient, Tag
+
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(file, chunk_size=JSON_CHUNK_SIZE):
+    """
+    По одному отдаёт элементы JSON-массива, читая файл частями.
+    В памяти держится только текущая часть файла.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position >= len(buffer) or not started:
+            if not started:
+                buffer = buffer[position:].lstrip()
+                position = 0
+                if buffer.startswith('['):
+                    started = True
+                    position = 1
+                    continue
+            if eof:
+                if not started:
+                    raise ValueError('Ожидался JSON-массив.')
+                return
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            end = None
+        if end is None or (end >= len(buffer) and not eof):
+            # Значение могло оборваться на границе части файла.
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+        position = end
+
+
+def iter_records(path):
+    """Записи из JSON-массива или CSV с заголовком."""
+    with open(path, encoding='utf-8', newline='') as file:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            yield from csv.DictReader(file)
+        else:
+            yield from iter_json_array(file)
+
+
+def iter_batches(records, batch_size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def upsert_ingredients(batch):
+    """
+    Добавляет пачку ингредиентов, которых ещё нет.
+    Уникальность - по ingredient_name_unit_unique, существующие строки
+    не удаляются и не меняются (других полей у ингредиента нет).
+    """
+    pairs = {
+        (record['name'].strip(), record['measurement_unit'].strip())
+        for record in batch
+    }
+    names = {name for name, _ in pairs}
+    existing = set(
+        Ingredient.objects.filter(name__in=names).values_list(
+            'name', 'measurement_unit'
+        )
+    )
+    new = pairs - existing
+    Ingredient.objects.bulk_create(
+        (
+            Ingredient(name=name, measurement_unit=measurement_unit)
+            for name, measurement_unit in new
+        ),
+        ignore_conflicts=True,
+    )
+    # ignore_conflicts молча пропускает строки - считаем записанные.
+    written = new & set(
+        Ingredient.objects.filter(name__in=names).values_list(
+            'name', 'measurement_unit'
+        )
+    )
+    return Counter(
+        inserted=len(written),
+        skipped=len(new) - len(written),
+        unchanged=len(existing & pairs),
+    )
+
+
+def upsert_tags(batch):
+    """
+    Добавляет пачку тегов, существующие обновляются по slug.
+    Строки, чьё название или цвет уже заняты другим тегом,
+    пропускаются: name и color у тегов тоже уникальны.
+    """
+    incoming = {
+        record['slug'].strip(): (
+            record['name'].strip(), record['color'].strip()
+        )
+        for record in batch
+    }
+    names = {name for name, _ in incoming.values()}
+    colors = {color for _, color in incoming.values()}
+    existing = {}
+    name_owners = {}
+    color_owners = {}
+    for tag in Tag.objects.filter(
+        Q(slug__in=incoming) | Q(name__in=names) | Q(color__in=colors)
+    ):
+        if tag.slug in incoming:
+            existing[tag.slug] = tag
+        name_owners[tag.name] = tag.slug
+        color_owners[tag.color] = tag.slug
+    new = []
+    changed = []
+    stats = Counter(inserted=0, updated=0, unchanged=0, skipped=0)
+    for slug, (name, color) in incoming.items():
+        if (
+            name_owners.setdefault(name, slug) != slug
+            or color_owners.setdefault(color, slug) != slug
+        ):
+            stats['skipped'] += 1
+            continue
+        tag = existing.get(slug)
+        if tag is None:
+            new.append(Tag(name=name, color=color, slug=slug))
+        elif (tag.name, tag.color) != (name, color):
+            tag.name, tag.color = name, color
+            changed.append(tag)
+        else:
+            stats['unchanged'] += 1
+    Tag.objects.bulk_create(new, ignore_conflicts=True)
+    Tag.objects.bulk_update(changed, ('name', 'color'))
+    # ignore_conflicts молча пропускает строки - считаем записанные.
+    stats['inserted'] = Tag.objects.filter(
+        slug__in=[tag.slug for tag in new]
+    ).count()
+    stats['skipped'] += len(new) - stats['inserted']
+    stats['updated'] = len(changed)
+    return stats
+
+
+def load_records(records, batch_size, upsert):
+    """
+    Идемпотентная загрузка записей пачками через upsert.
+    Возвращает счётчики inserted / updated / unchanged / skipped.
+    """
+    stats = Counter(inserted=0, updated=0, unchanged=0, skipped=0)
+    for batch in iter_batches(records, batch_size):
+        stats.update(upsert(batch))
+    return stats
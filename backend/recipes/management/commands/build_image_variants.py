@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_recipe_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Строит уменьшенные копии картинок рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='rebuild variants even if they are up to date'
+        )
+
+    def handle(self, *args, **options):
+        built = 0
+        recipes = Recipe.objects.exclude(image='').values_list(
+            'id', 'image', 'image_variants'
+        )
+        for recipe_id, image, variants in recipes.iterator():
+            if not options['force'] and variants.get('source') == image:
+                continue
+            build_recipe_variants(recipe_id, image)
+            built += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано картинок: {built}')
+        )
@@ -0,0 +1,175 @@
+import os
+import shutil
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import FileField, Q
+from django.utils import timezone
+
+from recipes.models import ImportIngredient, Recipe
+
+BATCH_SIZE = 500
+
+
+def walk_files(root, skip):
+    """Обходит каталог без построения полного списка файлов."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.path == skip:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path, skip)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def get_variant_paths(variants):
+    for paths in variants.values():
+        if isinstance(paths, dict):
+            yield from paths.values()
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из MEDIA_ROOT файлы, на которые не ссылается база.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='only report orphaned files'
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=24,
+            help='skip files modified less than this many hours ago'
+        )
+        parser.add_argument(
+            '--quarantine',
+            type=str,
+            default=None,
+            help='move orphaned files to this directory instead of deleting'
+        )
+        parser.add_argument(
+            '--prune-imports',
+            type=int,
+            default=None,
+            help='delete CSV import records older than this many days'
+        )
+
+    def handle(self, *args, **options):
+        if options['prune_imports'] is not None and not options['dry_run']:
+            deleted, _ = ImportIngredient.objects.filter(
+                date_added__lt=timezone.now() - timedelta(
+                    days=options['prune_imports']
+                )
+            ).delete()
+            self.stdout.write(f'Удалено записей импорта: {deleted}')
+        referenced = self.get_referenced_paths()
+        root = os.path.abspath(settings.MEDIA_ROOT)
+        quarantine = options['quarantine']
+        if quarantine:
+            quarantine = os.path.abspath(quarantine)
+        threshold = time.time() - options['min_age'] * 60 * 60
+        batch = []
+        orphans = 0
+        for entry in walk_files(root, quarantine):
+            name = os.path.relpath(entry.path, root).replace(os.sep, '/')
+            if name in referenced or entry.stat().st_mtime > threshold:
+                continue
+            batch.append(name)
+            if len(batch) >= BATCH_SIZE:
+                orphans += self.process(
+                    batch, root, quarantine, threshold, options['dry_run']
+                )
+                batch = []
+        orphans += self.process(
+            batch, root, quarantine, threshold, options['dry_run']
+        )
+        action = 'Найдено' if options['dry_run'] else 'Обработано'
+        self.stdout.write(
+            self.style.SUCCESS(f'{action} файлов-сирот: {orphans}')
+        )
+
+    @staticmethod
+    def get_referenced_paths():
+        """Пути из всех файловых полей - по одному запросу на модель."""
+        referenced = set()
+        for model in apps.get_models():
+            fields = [
+                field.attname
+                for field in model._meta.concrete_fields
+                if isinstance(field, FileField) and field.model is model
+            ]
+            if model is Recipe:
+                fields.append('image_variants')
+            if not fields:
+                continue
+            rows = model._default_manager.values_list(*fields)
+            for row in rows.iterator():
+                for value in row:
+                    if isinstance(value, dict):
+                        referenced.update(get_variant_paths(value))
+                    elif value:
+                        referenced.add(value)
+        return referenced
+
+    @staticmethod
+    def get_referenced_subset(names):
+        """
+        Какие из names сейчас указаны в файловых полях.
+        Ссылки из image_variants здесь не проверяются: варианты
+        записываются через хранилище, которое обновляет mtime файла,
+        и такие файлы отсеивает повторная проверка возраста.
+        """
+        referenced = set()
+        if not names:
+            return referenced
+        for model in apps.get_models():
+            fields = [
+                field.attname
+                for field in model._meta.concrete_fields
+                if isinstance(field, FileField) and field.model is model
+            ]
+            if not fields:
+                continue
+            query = Q()
+            for field in fields:
+                query |= Q(**{f'{field}__in': names})
+            for row in model._default_manager.filter(query).values_list(
+                *fields
+            ):
+                referenced.update(row)
+        return referenced
+
+    def process(self, batch, root, quarantine, threshold, dry_run):
+        """
+        Удаляет или переносит файлы пачки и возвращает их число.
+        Перед удалением ссылки и mtime проверяются заново: за время
+        обхода файл мог снова понадобиться загруженному рецепту.
+        """
+        referenced = self.get_referenced_subset(batch)
+        processed = 0
+        for name in batch:
+            path = os.path.join(root, name)
+            if name in referenced:
+                continue
+            try:
+                if os.stat(path).st_mtime > threshold:
+                    continue
+            except FileNotFoundError:
+                continue
+            processed += 1
+            if dry_run:
+                self.stdout.write(name)
+                continue
+            if quarantine:
+                target = os.path.join(quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(path, target)
+            else:
+                os.remove(path)
+        return processed
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from recipes.imports import fail_stale_imports
+
+
+class Command(BaseCommand):
+    help = (
+        'Помечает ошибкой импорты CSV, прерванные перезапуском процесса. '
+        'Запускается при старте приложения или периодически из cron.'
+    )
+
+    def handle(self, *args, **options):
+        failed = fail_stale_imports()
+        self.stdout.write(
+            self.style.SUCCESS(f'Прерванных импортов: {failed}')
+        )
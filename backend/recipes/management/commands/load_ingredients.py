@@ -1,64 +1,63 @@
-import json
+import os
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
+from recipes.catalog import bump_catalog_version
+from recipes.loaders import (
+    iter_records,
+    load_records,
+    upsert_ingredients,
+    upsert_tags,
+)
 from recipes.models import Ingredient, Tag
 
+BATCH_SIZE = 5000
+DATA_DIR = os.path.join(settings.BASE_DIR, 'data')
+
 
 class Command(BaseCommand):
+    help = 'Загружает ингредиенты и теги из JSON или CSV без удаления данных.'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--ingredients',
-            default='backend/data/ingredients.json',
+            default=os.path.join(DATA_DIR, 'ingredients.json'),
             type=str,
-            help='file path for ingredients data'
+            help='file path for ingredients data (.json or .csv)'
         )
         parser.add_argument(
             '--tags',
-            default='backend/data/tags.json',
+            default=os.path.join(DATA_DIR, 'tags.json'),
             type=str,
-            help='file path for tags data'
+            help='file path for tags data (.json or .csv)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            default=BATCH_SIZE,
+            type=int,
+            help='number of rows written per batch'
         )
 
     def handle(self, *args, **options):
-        print('Загрузка началась')
-        file_path = options['path']
-
-        try:
-            with open(file_path, encoding='utf-8') as f:
-                jsondata = json.load(f)
-                if 'color' in jsondata[0]:
-                    with transaction.atomic():
-                        Tag.objects.all().delete()
-                        tags_to_create = [
-                            Tag(
-                                name=line['name'],
-                                color=line['color'],
-                                slug=line['slug']
-                            )
-                            for line in jsondata
-                            if not Tag.objects.filter(
-                                slug=line['slug']
-                            ).exists()
-                        ]
-                        Tag.objects.bulk_create(tags_to_create)
-                elif 'measurement_unit' in jsondata[0]:
-                    with transaction.atomic():
-                        Ingredient.objects.all().delete()
-                        ingredients_to_create = [
-                            Ingredient(
-                                name=line['name'],
-                                measurement_unit=line['measurement_unit']
-                            )
-                            for line in jsondata
-                            if not Ingredient.objects.filter(
-                                name=line['name'],
-                                measurement_unit=line['measurement_unit']
-                            ).exists()
-                        ]
-                        Ingredient.objects.bulk_create(ingredients_to_create)
-            print('Загрузка завершена')
-        except FileNotFoundError:
-            print('Ошибка: Файл не найден')
+        for model, upsert, path in (
+            (Ingredient, upsert_ingredients, options['ingredients']),
+            (Tag, upsert_tags, options['tags']),
+        ):
+            if not path:
+                continue
+            if not os.path.exists(path):
+                raise CommandError(f'Файл не найден: {path}')
+            with transaction.atomic():
+                stats = load_records(
+                    iter_records(path), options['batch_size'], upsert
+                )
+            bump_catalog_version(model)
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: '
+                f'добавлено {stats["inserted"]}, '
+                f'обновлено {stats["updated"]}, '
+                f'без изменений {stats["unchanged"]}, '
+                f'пропущено {stats["skipped"]}'
+            ))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import ShoppingListItem
+from recipes.services import get_shopping_list_totals
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает или проверяет таблицу списков покупок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='only report mismatches, do not change data'
+        )
+
+    def handle(self, *args, **options):
+        expected = {
+            (row['recipe__shoppingcart__user'], row['ingredient']):
+                row['total']
+            for row in get_shopping_list_totals().iterator()
+        }
+        if options['verify']:
+            self.verify(expected)
+        else:
+            self.rebuild(expected)
+
+    def verify(self, expected):
+        mismatches = 0
+        actual = ShoppingListItem.objects.values_list(
+            'user_id', 'ingredient_id', 'total_amount'
+        )
+        for user_id, ingredient_id, total_amount in actual.iterator():
+            if expected.pop((user_id, ingredient_id), 0) != total_amount:
+                mismatches += 1
+        mismatches += len(expected)
+        if mismatches:
+            self.stdout.write(
+                self.style.ERROR(f'Расхождений: {mismatches}')
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+
+    @transaction.atomic
+    def rebuild(self, expected):
+        ShoppingListItem.objects.all().delete()
+        ShoppingListItem.objects.bulk_create(
+            (
+                ShoppingListItem(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    total_amount=total,
+                )
+                for (user_id, ingredient_id), total in expected.items()
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Записано позиций: {len(expected)}')
+        )
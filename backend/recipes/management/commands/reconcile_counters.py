@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.services import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики избранного, корзин, рецептов и подписчиков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='only report drift, do not change data'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = reconcile_counters(dry_run=options['dry_run'])
+        for counter, count in drift.items():
+            self.stdout.write(f'{counter}: {count}')
+        total = sum(drift.values())
+        if not total:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.ERROR(f'Расхождений: {total}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Исправлено: {total}'))
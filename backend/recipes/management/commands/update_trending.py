@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from foodgram.constants import TRENDING_BATCH_SIZE
+from recipes.trending import TrendingLocked, update_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг популярных рецептов по новым событиям. '
+        'Запускается периодически, например из cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=TRENDING_BATCH_SIZE,
+            help='events (by id) processed per transaction'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            processed = update_trending(options['batch_size'])
+        except TrendingLocked as error:
+            raise CommandError(error)
+        for source, events in processed.items():
+            self.stdout.write(f'{source}: {events}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Учтено событий: {sum(processed.values())}')
+        )
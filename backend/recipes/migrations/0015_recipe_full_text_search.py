@@ -0,0 +1,70 @@
+# Generated by Django 3.2.20 on 2026-10-18 12:00
+
+from django.db import migrations
+
+POSTGRESQL_FORWARD = (
+    "ALTER TABLE recipes_recipe ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(text, '')), 'B')"
+    ") STORED",
+    "CREATE INDEX recipe_search_vector_idx ON recipes_recipe "
+    "USING GIN (search_vector)",
+)
+POSTGRESQL_BACKWARD = (
+    "DROP INDEX IF EXISTS recipe_search_vector_idx",
+    "ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector",
+)
+SQLITE_FORWARD = (
+    "CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5("
+    "name, text, content='recipes_recipe', content_rowid='id')",
+    "CREATE TRIGGER recipes_recipe_fts_insert AFTER INSERT ON recipes_recipe "
+    "BEGIN "
+    "INSERT INTO recipes_recipe_fts(rowid, name, text) "
+    "VALUES (new.id, new.name, new.text); "
+    "END",
+    "CREATE TRIGGER recipes_recipe_fts_delete AFTER DELETE ON recipes_recipe "
+    "BEGIN "
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text) "
+    "VALUES ('delete', old.id, old.name, old.text); "
+    "END",
+    "CREATE TRIGGER recipes_recipe_fts_update AFTER UPDATE ON recipes_recipe "
+    "BEGIN "
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts, rowid, name, text) "
+    "VALUES ('delete', old.id, old.name, old.text); "
+    "INSERT INTO recipes_recipe_fts(rowid, name, text) "
+    "VALUES (new.id, new.name, new.text); "
+    "END",
+    "INSERT INTO recipes_recipe_fts(recipes_recipe_fts) VALUES ('rebuild')",
+)
+SQLITE_BACKWARD = (
+    "DROP TRIGGER IF EXISTS recipes_recipe_fts_insert",
+    "DROP TRIGGER IF EXISTS recipes_recipe_fts_delete",
+    "DROP TRIGGER IF EXISTS recipes_recipe_fts_update",
+    "DROP TABLE IF EXISTS recipes_recipe_fts",
+)
+
+
+def run_for_vendor(postgresql, sqlite):
+    def run(apps, schema_editor):
+        statements = {
+            'postgresql': postgresql,
+            'sqlite': sqlite,
+        }.get(schema_editor.connection.vendor, ())
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRESQL_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRESQL_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.20 on 2026-10-18 12:00
+
+from django.db import migrations
+
+FORWARD = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS ingredient_name_trgm_idx '
+    'ON recipes_ingredient USING GIN (name gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ingredient_name_upper_trgm_idx '
+    'ON recipes_ingredient USING GIN (UPPER(name) gin_trgm_ops)',
+)
+BACKWARD = (
+    'DROP INDEX IF EXISTS ingredient_name_upper_trgm_idx',
+    'DROP INDEX IF EXISTS ingredient_name_trgm_idx',
+)
+
+
+def run_on_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_recipe_full_text_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(FORWARD), run_on_postgresql(BACKWARD)
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.2.20 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+def mark_existing_done(apps, schema_editor):
+    ImportIngredient = apps.get_model('recipes', 'ImportIngredient')
+    ImportIngredient.objects.update(status='done')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importingredient',
+            name='status',
+            field=models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершён'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус'),
+        ),
+        migrations.AddField(
+            model_name='importingredient',
+            name='total_rows',
+            field=models.PositiveIntegerField(default=0, verbose_name='Всего строк'),
+        ),
+        migrations.AddField(
+            model_name='importingredient',
+            name='processed_rows',
+            field=models.PositiveIntegerField(default=0, verbose_name='Обработано'),
+        ),
+        migrations.AddField(
+            model_name='importingredient',
+            name='inserted_rows',
+            field=models.PositiveIntegerField(default=0, verbose_name='Добавлено'),
+        ),
+        migrations.AddField(
+            model_name='importingredient',
+            name='skipped_rows',
+            field=models.PositiveIntegerField(default=0, verbose_name='Пропущено'),
+        ),
+        migrations.AddField(
+            model_name='importingredient',
+            name='error_rows',
+            field=models.PositiveIntegerField(default=0, verbose_name='С ошибками'),
+        ),
+        migrations.AddField(
+            model_name='importingredient',
+            name='errors',
+            field=models.JSONField(blank=True, default=list, verbose_name='Ошибки'),
+        ),
+        migrations.AddField(
+            model_name='importingredient',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Завершён'),
+        ),
+        migrations.RunPython(mark_existing_done, migrations.RunPython.noop),
+    ]
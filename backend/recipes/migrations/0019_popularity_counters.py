@@ -0,0 +1,52 @@
+# Generated by Django 3.2.20 on 2026-10-18 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTED_RELATIONS = (
+    ('recipes', 'Favorite', 'recipe', 'recipes', 'Recipe', 'favorites_count'),
+    ('recipes', 'ShoppingCart', 'recipe', 'recipes', 'Recipe', 'in_carts_count'),
+    ('recipes', 'Recipe', 'author', 'users', 'User', 'recipes_count'),
+    ('users', 'Subscribed', 'author', 'users', 'User', 'followers_count'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for app, model, field, target_app, target, counter in COUNTED_RELATIONS:
+        relations = apps.get_model(app, model).objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(total=Count('pk')).values('total')
+        apps.get_model(target_app, target).objects.update(
+            **{counter: Coalesce(Subquery(relations), 0)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_counters'),
+        ('recipes', '0018_import_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В корзинах'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['favorites_count', 'id'], name='recipe_favorites_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['in_carts_count', 'id'], name='recipe_in_carts_count_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
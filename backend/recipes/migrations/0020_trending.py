@@ -0,0 +1,74 @@
+# Generated by Django 3.2.20 on 2026-10-18 12:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def start_from_now(apps, schema_editor):
+    """У старых связей нет времени добавления - рейтинг считается с нуля."""
+    Favorite = apps.get_model('recipes', 'Favorite')
+    ShoppingCart = apps.get_model('recipes', 'ShoppingCart')
+    TrendingState = apps.get_model('recipes', 'TrendingState')
+    TrendingState.objects.create(
+        pk=1,
+        favorite_last_id=(
+            Favorite.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        ),
+        shoppingcart_last_id=(
+            ShoppingCart.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        ),
+        computed_at=django.utils.timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0019_popularity_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Добавлено'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('favorite_last_id', models.BigIntegerField(default=0)),
+                ('shoppingcart_last_id', models.BigIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Состояние расчёта рейтинга',
+                'verbose_name_plural': 'Состояние расчёта рейтинга',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeScore',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('score', models.FloatField(default=0, verbose_name='Рейтинг')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинги рецептов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-score', '-recipe'], name='recipe_score_idx'),
+        ),
+        migrations.RunPython(start_from_now, migrations.RunPython.noop),
+    ]
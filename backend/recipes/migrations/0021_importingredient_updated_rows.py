@@ -0,0 +1,18 @@
+# Generated by Django 3.2.20 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0020_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importingredient',
+            name='updated_rows',
+            field=models.PositiveIntegerField(default=0, verbose_name='Обновлено'),
+        ),
+    ]
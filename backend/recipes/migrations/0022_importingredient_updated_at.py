@@ -0,0 +1,20 @@
+# Generated by Django 3.2.20 on 2026-10-18 12:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0021_importingredient_updated_rows'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importingredient',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Обновлён'),
+            preserve_default=False,
+        ),
+    ]
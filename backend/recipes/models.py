@@ -10,20 +10,49 @@ from foodgram.constants import (
     MAX_INGREDIENT,
     MAX_LENGTH,
     MAX_LENGTH_COLOR,
+    MAX_LENGTH_STATUS,
     MAX_TIME_COOK,
     MAX_VALUE_COUNT,
     MIN_INGREDIENT,
     MIN_TIME_COOK,
     MIN_VALUE_COUNT,
 )
+from foodgram.counters import CounterFieldsMixin
 from users.models import User
 
 
 class ImportIngredient(models.Model):
-    """Модель импорта ингридиентов."""
+    """Модель импорта ингридиентов.
+    Хранит загруженный файл и ход фоновой обработки."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершён'),
+        (FAILED, 'Ошибка'),
+    )
 
     csv_file = models.FileField(upload_to='uploads/')
     date_added = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(
+        'Статус',
+        max_length=MAX_LENGTH_STATUS,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    total_rows = models.PositiveIntegerField('Всего строк', default=0)
+    processed_rows = models.PositiveIntegerField('Обработано', default=0)
+    inserted_rows = models.PositiveIntegerField('Добавлено', default=0)
+    updated_rows = models.PositiveIntegerField('Обновлено', default=0)
+    skipped_rows = models.PositiveIntegerField('Пропущено', default=0)
+    error_rows = models.PositiveIntegerField('С ошибками', default=0)
+    errors = models.JSONField('Ошибки', default=list, blank=True)
+    finished_at = models.DateTimeField('Завершён', null=True, blank=True)
+    updated_at = models.DateTimeField('Обновлён', auto_now=True)
 
 
 class ImportTag(ImportIngredient):
@@ -99,9 +128,11 @@ class Ingredient(models.Model):
         return f'{self.name},в {self.measurement_unit}'
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель рецептов."""
 
+    counter_fields = ('favorites_count', 'in_carts_count')
+
     ingredients = models.ManyToManyField(
         Ingredient,
         through='RecipeIngredient',
@@ -115,6 +146,12 @@ class Recipe(models.Model):
         'Изображение блюда',
         upload_to=DIRICTORY_PATH,
     )
+    image_variants = models.JSONField(
+        'Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     name = models.CharField(
         'Название блюда',
         max_length=MAX_LENGTH,
@@ -139,6 +176,12 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата публикации'
     )
+    favorites_count = models.PositiveIntegerField(
+        'В избранном', default=0, editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        'В корзинах', default=0, editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
@@ -150,6 +193,19 @@ class Recipe(models.Model):
                 name='unique_for_author'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'), name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('favorites_count', 'id'),
+                name='recipe_favorites_count_idx',
+            ),
+            models.Index(
+                fields=('in_carts_count', 'id'),
+                name='recipe_in_carts_count_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -211,6 +267,7 @@ class UserRecipeRelation(models.Model):
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE, verbose_name='Рецепт'
     )
+    created = models.DateTimeField('Добавлено', auto_now_add=True)
 
     class Meta:
         abstract = True
@@ -242,3 +299,77 @@ class ShoppingCart(UserRecipeRelation):
         default_related_name = 'shoppingcart'
         verbose_name = 'Корзина'
         verbose_name_plural = 'Корзина'
+
+
+class ShoppingListItem(models.Model):
+    """
+    Итоговое количество ингредиента в списке покупок пользователя.
+    Пересчитывается при изменении корзины и рецептов в ней.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент',
+    )
+    total_amount = models.PositiveIntegerField('Количество', default=0)
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Список покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_item',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.ingredient}: {self.total_amount}'
+
+
+class RecipeScore(models.Model):
+    """
+    Популярность рецепта по избранному и корзинам с затуханием во времени.
+    Пересчитывается командой update_trending.
+    """
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Рецепт',
+    )
+    score = models.FloatField('Рейтинг', default=0)
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(
+                fields=('-score', '-recipe'), name='recipe_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.score}'
+
+
+class TrendingState(models.Model):
+    """Докуда учтены события и когда применено затухание RecipeScore."""
+
+    favorite_last_id = models.BigIntegerField(default=0)
+    shoppingcart_last_id = models.BigIntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Состояние расчёта рейтинга'
+        verbose_name_plural = 'Состояние расчёта рейтинга'
@@ -0,0 +1,312 @@
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict, namedtuple
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+    TrigramSimilarity,
+)
+from django.db import connection, connections
+from django.db.models import Case, Count, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from foodgram.constants import (
+    INGREDIENT_INDEX_TTL,
+    SEARCH_CONFIG,
+    TRIGRAM_THRESHOLD,
+)
+
+from .catalog import get_catalog_version
+from .models import Ingredient, Recipe, RecipeIngredient
+
+WORD_RE = re.compile(r'\w+')
+
+
+def get_trigrams(value):
+    """
+    Триграммы строки как в pg_trgm: каждое слово дополняется
+    двумя пробелами слева и одним справа.
+    """
+    trigrams = set()
+    for word in WORD_RE.findall(value.casefold()):
+        padded = f'  {word} '
+        trigrams.update(
+            padded[position:position + 3]
+            for position in range(len(padded) - 2)
+        )
+    return trigrams
+
+
+IndexData = namedtuple(
+    'IndexData', ('keys', 'rows', 'usage', 'trigrams', 'postings')
+)
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов в памяти процесса.
+    Хранит отсортированный список названий в нижнем регистре
+    для поиска по началу названия и триграммный индекс
+    для поиска по подстроке и с опечатками.
+    Загружается из базы при первом обращении и перезагружается,
+    когда меняется версия справочника ингредиентов
+    или истекает INGREDIENT_INDEX_TTL (частота использования).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.loaded_at = 0
+        self.data = IndexData([], [], [], [], {})
+
+    def load(self, version):
+        usage = dict(
+            RecipeIngredient.objects.values('ingredient').annotate(
+                total=Count('id')
+            ).order_by().values_list('ingredient', 'total')
+        )
+        rows = sorted(
+            (name.casefold(), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            ).order_by().iterator()
+        )
+        trigrams = [get_trigrams(row[0]) for row in rows]
+        postings = defaultdict(list)
+        for position, row_trigrams in enumerate(trigrams):
+            for trigram in row_trigrams:
+                postings[trigram].append(position)
+        self.data = IndexData(
+            keys=[row[0] for row in rows],
+            rows=[
+                {'id': pk, 'name': name, 'measurement_unit': unit}
+                for _, pk, name, unit in rows
+            ],
+            usage=[usage.get(row[1], 0) for row in rows],
+            trigrams=trigrams,
+            postings=dict(postings),
+        )
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self):
+        version = get_catalog_version(Ingredient).token
+        if self.is_fresh(version):
+            return
+        with self.lock:
+            if not self.is_fresh(version):
+                self.load(version)
+
+    def is_fresh(self, version):
+        return (
+            version == self.version
+            and time.monotonic() - self.loaded_at < INGREDIENT_INDEX_TTL
+        )
+
+    def search(self, prefix, limit):
+        """Ингредиенты, название которых начинается с prefix."""
+        self.ensure_loaded()
+        keys, rows = self.data.keys, self.data.rows
+        prefix = prefix.casefold()
+        start = bisect_left(keys, prefix)
+        result = []
+        for position in range(start, min(start + limit, len(keys))):
+            if not keys[position].startswith(prefix):
+                break
+            result.append(rows[position])
+        return result
+
+    def fuzzy_search(self, value, limit):
+        """
+        Ранжированный поиск: сначала совпадения по началу названия,
+        затем по подстроке, затем похожие по триграммам.
+        Внутри группы - по сходству и частоте использования в рецептах.
+        """
+        self.ensure_loaded()
+        data = self.data
+        value = value.casefold().strip()
+        if not value:
+            return self.search(value, limit)
+        query_trigrams = get_trigrams(value)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(data.postings.get(trigram, ()))
+        candidates = {}
+        for position, count in shared.items():
+            similarity = count / (
+                len(query_trigrams) + len(data.trigrams[position]) - count
+            )
+            if (
+                similarity >= TRIGRAM_THRESHOLD
+                or value in data.keys[position]
+            ):
+                candidates[position] = similarity
+        if len(value) < 3:
+            for position, key in enumerate(data.keys):
+                if value in key:
+                    candidates.setdefault(position, 0)
+
+        def rank(position):
+            key = data.keys[position]
+            if key.startswith(value):
+                match = 0
+            elif value in key:
+                match = 1
+            else:
+                match = 2
+            return (
+                match, -candidates[position], -data.usage[position], key
+            )
+
+        return [
+            data.rows[position]
+            for position in heapq.nsmallest(limit, candidates, key=rank)
+        ]
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_ingredients(value, limit):
+    """
+    Ранжированный поиск ингредиентов с опечатками.
+    На PostgreSQL - через pg_trgm и GIN-индексы по названию,
+    на остальных базах - по триграммному индексу в памяти.
+    """
+    if connection.vendor != 'postgresql':
+        return ingredient_index.fuzzy_search(value, limit)
+    value = value.strip()
+    if not value:
+        return ingredient_index.search(value, limit)
+    return list(
+        Ingredient.objects.filter(
+            Q(name__icontains=value) | Q(name__trigram_similar=value)
+        ).annotate(
+            match=Case(
+                When(name__istartswith=value, then=Value(0)),
+                When(name__icontains=value, then=Value(1)),
+                default=Value(2),
+            ),
+            similarity=TrigramSimilarity('name', value),
+            usage=Count('ingredients'),
+        ).order_by(
+            'match', '-similarity', '-usage', 'name'
+        ).values('id', 'name', 'measurement_unit')[:limit]
+    )
+
+
+FTS_TRIGGERS = {
+    'recipes_recipe_fts_insert': (
+        'CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_insert '
+        'AFTER INSERT ON recipes_recipe '
+        'BEGIN '
+        'INSERT INTO recipes_recipe_fts(rowid, name, text) '
+        'VALUES (new.id, new.name, new.text); '
+        'END'
+    ),
+    'recipes_recipe_fts_delete': (
+        'CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_delete '
+        'AFTER DELETE ON recipes_recipe '
+        'BEGIN '
+        'INSERT INTO recipes_recipe_fts'
+        '(recipes_recipe_fts, rowid, name, text) '
+        "VALUES ('delete', old.id, old.name, old.text); "
+        'END'
+    ),
+    'recipes_recipe_fts_update': (
+        'CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_update '
+        'AFTER UPDATE ON recipes_recipe '
+        'BEGIN '
+        'INSERT INTO recipes_recipe_fts'
+        '(recipes_recipe_fts, rowid, name, text) '
+        "VALUES ('delete', old.id, old.name, old.text); "
+        'INSERT INTO recipes_recipe_fts(rowid, name, text) '
+        'VALUES (new.id, new.name, new.text); '
+        'END'
+    ),
+}
+
+
+def restore_fts_triggers(using):
+    """
+    SQLite пересоздаёт таблицу рецептов при AddField и AlterField
+    в миграциях, и триггеры FTS5 пропадают вместе со старой таблицей.
+    После migrate недостающие триггеры создаются заново,
+    а индекс перестраивается.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT type, name FROM sqlite_master "
+            "WHERE name = 'recipes_recipe_fts' "
+            "OR (type = 'trigger' AND tbl_name = 'recipes_recipe')"
+        )
+        existing = {name for _, name in cursor.fetchall()}
+        if 'recipes_recipe_fts' not in existing:
+            return
+        missing = FTS_TRIGGERS.keys() - existing
+        for name in missing:
+            cursor.execute(FTS_TRIGGERS[name])
+        if missing:
+            cursor.execute(
+                'INSERT INTO recipes_recipe_fts(recipes_recipe_fts) '
+                "VALUES ('rebuild')"
+            )
+
+
+def get_fts5_query(value):
+    """Слова запроса как префиксные термы FTS5, кавычки экранируются."""
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""')) for word in value.split()
+    )
+
+
+def search_recipes(queryset, value):
+    """
+    Полнотекстовый поиск рецептов по названию и описанию.
+    На PostgreSQL - по столбцу search_vector с GIN-индексом,
+    на SQLite - по таблице FTS5 recipes_recipe_fts.
+    Результаты упорядочены по релевантности (search_rank).
+    """
+    table = Recipe._meta.db_table
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        vector = RawSQL(
+            f'"{table}"."search_vector"', (),
+            output_field=SearchVectorField(),
+        )
+        queryset = queryset.alias(search_vector=vector).annotate(
+            search_rank=SearchRank(vector, search_query),
+        ).filter(search_vector=search_query)
+    elif connection.vendor == 'sqlite':
+        fts_query = get_fts5_query(value)
+        if not fts_query:
+            return queryset
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                f'SELECT rowid FROM {table}_fts '
+                f'WHERE {table}_fts MATCH %s',
+                (fts_query,),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f'(SELECT -bm25({table}_fts) FROM {table}_fts '
+                f'WHERE {table}_fts MATCH %s AND rowid = "{table}"."id")',
+                (fts_query,),
+                output_field=FloatField(),
+            )
+        )
+    else:
+        return queryset.filter(
+            Q(name__icontains=value) | Q(text__icontains=value)
+        )
+    return queryset.order_by('-search_rank', '-pub_date')
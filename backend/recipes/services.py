@@ -0,0 +1,265 @@
+from collections import Counter
+
+from django.db import connection
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from users.models import Subscribed
+
+from .models import (
+    Favorite,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+)
+
+# Денормализованные счётчики: (модель связи, поле, счётчик у объекта поля).
+COUNTED_RELATIONS = (
+    (Favorite, 'recipe', 'favorites_count'),
+    (ShoppingCart, 'recipe', 'in_carts_count'),
+    (Recipe, 'author', 'recipes_count'),
+    (Subscribed, 'author', 'followers_count'),
+)
+
+
+def get_recipe_amounts(recipe):
+    """Количество каждого ингредиента в рецепте."""
+    return dict(
+        RecipeIngredient.objects.filter(recipe=recipe).values_list(
+            'ingredient_id', 'amount'
+        )
+    )
+
+
+def apply_shopping_list_delta(user_ids, deltas):
+    """
+    Прибавляет deltas ({ingredient_id: количество}) к спискам покупок
+    пользователей одним UPDATE, создавая недостающие позиции
+    и удаляя обнулившиеся.
+    """
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items()
+        if delta
+    }
+    user_ids = list(user_ids)
+    if not deltas or not user_ids:
+        return
+    ShoppingListItem.objects.bulk_create(
+        (
+            ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id)
+            for user_id in user_ids
+            for ingredient_id, delta in deltas.items()
+            if delta > 0
+        ),
+        ignore_conflicts=True,
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=deltas
+    )
+    items.update(
+        total_amount=Greatest(
+            F('total_amount') + Case(
+                *(
+                    When(ingredient_id=ingredient_id, then=Value(delta))
+                    for ingredient_id, delta in deltas.items()
+                ),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+    )
+    items.filter(total_amount=0).delete()
+
+
+def add_recipe_to_shopping_list(user_id, recipe):
+    """Добавляет ингредиенты рецепта в список покупок."""
+    apply_shopping_list_delta([user_id], get_recipe_amounts(recipe))
+
+
+def remove_recipe_from_shopping_list(user_id, recipe):
+    """Вычитает ингредиенты рецепта из списка покупок."""
+    apply_shopping_list_delta(
+        [user_id],
+        {
+            ingredient_id: -amount
+            for ingredient_id, amount in get_recipe_amounts(recipe).items()
+        },
+    )
+
+
+def sync_recipe_in_shopping_lists(recipe, old_amounts):
+    """
+    Переносит изменение состава рецепта в списки покупок
+    всех пользователей, у которых рецепт лежит в корзине.
+    old_amounts - состав рецепта до изменения.
+    """
+    deltas = Counter(get_recipe_amounts(recipe))
+    deltas.subtract(old_amounts)
+    apply_shopping_list_delta(
+        ShoppingCart.objects.filter(recipe=recipe).values_list(
+            'user_id', flat=True
+        ),
+        deltas,
+    )
+
+
+def get_shopping_list_totals():
+    """
+    Эталонные суммы ингредиентов по корзинам всех пользователей,
+    посчитанные заново из RecipeIngredient и ShoppingCart.
+    """
+    return (
+        RecipeIngredient.objects.filter(recipe__shoppingcart__isnull=False)
+        .values('recipe__shoppingcart__user', 'ingredient')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+
+
+def add_relation(model, **values):
+    """
+    Добавляет связь одной командой INSERT ... ON CONFLICT DO NOTHING.
+    Возвращает False, если такая связь уже есть.
+    Сигналы post_save не отправляются, auto_now_add заполняется здесь.
+    """
+    opts = model._meta
+    now = timezone.now()
+    for field in opts.concrete_fields:
+        if getattr(field, 'auto_now_add', False):
+            values.setdefault(field.name, now)
+    fields = [opts.get_field(name) for name in values]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(opts.db_table)} ({columns}) '
+            f'VALUES ({placeholders}) ON CONFLICT DO NOTHING',
+            [
+                field.get_db_prep_save(values[field.name], connection)
+                for field in fields
+            ],
+        )
+        added = cursor.rowcount == 1
+    if added:
+        update_counters(
+            model,
+            {field.attname: values[field.name] for field in fields},
+            1,
+        )
+    return added
+
+
+def update_counters(model, values, delta):
+    """
+    Сдвигает счётчики объектов, на которые ссылается связь, на delta.
+    values - значения полей связи по attname, например vars(instance).
+    """
+    for relation, field_name, counter in COUNTED_RELATIONS:
+        if relation is not model:
+            continue
+        field = model._meta.get_field(field_name)
+        field.related_model.objects.filter(pk=values[field.attname]).update(
+            **{counter: Greatest(F(counter) + delta, 0)}
+        )
+
+
+def get_actual_count(relation, field_name):
+    return Coalesce(
+        Subquery(
+            relation.objects.filter(**{field_name: OuterRef('pk')})
+            .order_by()
+            .values(field_name)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def reconcile_counters(dry_run=False):
+    """
+    Пересчитывает счётчики из таблиц связей.
+    Возвращает количество расходившихся объектов по каждому счётчику.
+    """
+    drift = {}
+    for relation, field_name, counter in COUNTED_RELATIONS:
+        target = relation._meta.get_field(field_name).related_model
+        actual = get_actual_count(relation, field_name)
+        stale = target.objects.exclude(**{counter: actual})
+        drift[counter] = (
+            stale.count() if dry_run else stale.update(**{counter: actual})
+        )
+    return drift
+
+
+def remove_relation(model, **values):
+    """
+    Удаляет связь одной командой DELETE ... RETURNING.
+    Возвращает False, если удалять было нечего.
+    Сигналы удаления не отправляются: счётчики сдвигаются здесь
+    и только если строка действительно удалена этим запросом.
+    """
+    opts = model._meta
+    fields = [opts.get_field(name) for name in values]
+    returning = [field for field in opts.concrete_fields if field.is_relation]
+    quote = connection.ops.quote_name
+    conditions = ' AND '.join(
+        f'{quote(field.column)} = %s' for field in fields
+    )
+    columns = ', '.join(quote(field.column) for field in returning)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(opts.db_table)} WHERE {conditions} '
+            f'RETURNING {columns}',
+            [
+                field.get_db_prep_save(values[field.name], connection)
+                for field in fields
+            ],
+        )
+        rows = cursor.fetchall()
+    for row in rows:
+        update_counters(
+            model,
+            {field.attname: value for field, value in zip(returning, row)},
+            -1,
+        )
+    return bool(rows)
+
+
+def add_to_favorite(user_id, recipe_id):
+    return add_relation(Favorite, user=user_id, recipe=recipe_id)
+
+
+def add_to_shopping_cart(user_id, recipe_id):
+    """Кладёт рецепт в корзину и его ингредиенты - в список покупок."""
+    added = add_relation(ShoppingCart, user=user_id, recipe=recipe_id)
+    if added:
+        add_recipe_to_shopping_list(user_id, recipe_id)
+    return added
+
+
+def remove_from_favorite(user_id, recipe_id):
+    return remove_relation(Favorite, user=user_id, recipe=recipe_id)
+
+
+def remove_from_shopping_cart(user_id, recipe_id):
+    """Убирает рецепт из корзины и его ингредиенты - из списка покупок."""
+    removed = remove_relation(ShoppingCart, user=user_id, recipe=recipe_id)
+    if removed:
+        remove_recipe_from_shopping_list(user_id, recipe_id)
+    return removed
@@ -0,0 +1,65 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import Subscribed
+
+from .catalog import bump_catalog_version
+from .images import schedule_recipe_variants
+from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from .search import restore_fts_triggers
+from .services import (
+    add_recipe_to_shopping_list,
+    remove_recipe_from_shopping_list,
+    update_counters,
+)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_added(sender, instance, created, **kwargs):
+    if created:
+        add_recipe_to_shopping_list(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def shopping_cart_removed(sender, instance, **kwargs):
+    """
+    pre_delete, а не post_delete: при каскадном удалении рецепта
+    его ингредиенты ещё не удалены.
+    """
+    remove_recipe_from_shopping_list(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def catalog_changed(sender, **kwargs):
+    bump_catalog_version(sender)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, **kwargs):
+    schedule_recipe_variants(instance)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=Subscribed)
+def counted_relation_added(sender, instance, created, **kwargs):
+    """Связи, добавленные через add_relation, учтены там же."""
+    if created:
+        update_counters(sender, vars(instance), 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=Subscribed)
+def counted_relation_removed(sender, instance, **kwargs):
+    update_counters(sender, vars(instance), -1)
+
+
+def recipes_migrated(sender, using, **kwargs):
+    """Подключается в RecipesConfig.ready для post_migrate."""
+    restore_fts_triggers(using)
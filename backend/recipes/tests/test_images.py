@@ -0,0 +1,30 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase
+from PIL import Image
+
+from recipes import images
+
+
+class RenderVariantsTest(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = FileSystemStorage(location=self.root)
+
+    def test_failed_format_keeps_other_variants(self):
+        formats = (('JPEG', 'jpg'), ('NOSUCHFORMAT', 'nsf'))
+        with mock.patch.object(images, 'IMAGE_VARIANT_FORMATS', formats):
+            variants = images.render_variants(
+                Image.new('RGB', (1000, 800), 'red'),
+                self.storage,
+                'recipes/images/soup.png',
+            )
+        self.assertEqual(set(variants), set(images.IMAGE_VARIANT_SIZES))
+        for paths in variants.values():
+            self.assertEqual(set(paths), {'jpg'})
+            self.assertTrue(self.storage.exists(paths['jpg']))
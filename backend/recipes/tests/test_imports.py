@@ -0,0 +1,80 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from foodgram.constants import IMPORT_STALE_TIMEOUT
+from recipes.catalog import get_catalog_version
+from recipes.imports import STALE_IMPORT_ERROR, fail_stale_imports, run_import
+from recipes.models import ImportIngredient, ImportTag, Tag
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    },
+)
+class TagImportTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.create(name='завтрак', color='#a87d32', slug='breakfast')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def run_tag_import(self, content):
+        job = ImportTag.objects.create()
+        job.csv_file.save('tags.csv', ContentFile(content.encode()))
+        run_import(job.pk, 'tag')
+        return ImportIngredient.objects.get(pk=job.pk)
+
+    def test_update_only_import_bumps_catalog(self):
+        version = get_catalog_version(Tag)
+        job = self.run_tag_import(
+            'name,color,slug\nранний завтрак,#a87d32,breakfast\n'
+        )
+        self.assertEqual(job.status, ImportIngredient.DONE)
+        self.assertEqual(job.updated_rows, 1)
+        self.assertEqual(job.inserted_rows, 0)
+        self.assertNotEqual(get_catalog_version(Tag), version)
+
+    def test_conflicting_row_is_skipped(self):
+        job = self.run_tag_import(
+            'name,color,slug\nзавтрак,#000000,zavtrac\n'
+        )
+        self.assertEqual(job.inserted_rows, 0)
+        self.assertEqual(job.skipped_rows, 1)
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_stale_import_is_failed_and_not_started(self):
+        job = ImportTag.objects.create()
+        job.csv_file.save(
+            'tags.csv',
+            ContentFile('name,color,slug\nужин,#123456,dinner\n'.encode()),
+        )
+        fresh = ImportTag.objects.create(status=ImportIngredient.RUNNING)
+        ImportIngredient.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(
+                seconds=IMPORT_STALE_TIMEOUT + 1
+            )
+        )
+        self.assertEqual(fail_stale_imports(), 1)
+        run_import(job.pk, 'tag')
+        job = ImportIngredient.objects.get(pk=job.pk)
+        self.assertEqual(job.status, ImportIngredient.FAILED)
+        self.assertEqual(job.errors[-1]['error'], STALE_IMPORT_ERROR)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(Tag.objects.filter(slug='dinner').exists())
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, ImportIngredient.RUNNING)
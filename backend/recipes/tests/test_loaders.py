@@ -0,0 +1,47 @@
+from django.test import TestCase
+
+from recipes.loaders import upsert_ingredients, upsert_tags
+from recipes.models import Ingredient, Tag
+
+
+class UpsertTagsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Tag.objects.create(name='завтрак', color='#a87d32', slug='breakfast')
+
+    def test_conflicting_rows_are_skipped(self):
+        stats = upsert_tags([
+            {'name': 'завтрак', 'color': '#000000', 'slug': 'zavtrac'},
+            {'name': 'ужин', 'color': '#a87d32', 'slug': 'dinner'},
+            {'name': 'обед', 'color': '#32a84a', 'slug': 'lunch'},
+        ])
+        self.assertEqual(stats['inserted'], 1)
+        self.assertEqual(stats['skipped'], 2)
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_existing_tag_is_updated(self):
+        stats = upsert_tags([
+            {'name': 'ранний завтрак', 'color': '#a87d32',
+             'slug': 'breakfast'},
+        ])
+        self.assertEqual(stats['updated'], 1)
+        self.assertEqual(stats['inserted'], 0)
+        self.assertEqual(
+            Tag.objects.get(slug='breakfast').name, 'ранний завтрак'
+        )
+
+
+class UpsertIngredientsTest(TestCase):
+
+    def test_repeated_load_inserts_nothing(self):
+        batch = [
+            {'name': 'соль', 'measurement_unit': 'г'},
+            {'name': 'соль', 'measurement_unit': 'г'},
+            {'name': 'вода', 'measurement_unit': 'мл'},
+        ]
+        self.assertEqual(upsert_ingredients(batch)['inserted'], 2)
+        stats = upsert_ingredients(batch)
+        self.assertEqual(stats['inserted'], 0)
+        self.assertEqual(stats['unchanged'], 2)
+        self.assertEqual(Ingredient.objects.count(), 2)
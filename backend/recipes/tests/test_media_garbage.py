@@ -0,0 +1,46 @@
+import os
+import time
+
+from django.conf import settings
+
+from api.tests.base import FoodgramAPITestCase
+from recipes.management.commands.collect_media_garbage import Command
+from recipes.models import Recipe
+
+DAY = 24 * 60 * 60
+
+
+class CollectMediaGarbageTest(FoodgramAPITestCase):
+
+    def make_file(self, name, age):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(b'orphan')
+        moment = time.time() - age
+        os.utime(path, (moment, moment))
+        return path
+
+    def setUp(self):
+        super().setUp()
+        self.root = os.path.abspath(settings.MEDIA_ROOT)
+        self.threshold = time.time() - DAY
+
+    def test_batch_is_rechecked_before_deleting(self):
+        self.create_recipe('Борщ')
+        image = Recipe.objects.get().image.name
+        image_path = os.path.join(self.root, image)
+        os.utime(image_path, (self.threshold - DAY, self.threshold - DAY))
+        orphan = self.make_file('orphans/old.txt', 2 * DAY)
+        fresh = self.make_file('orphans/fresh.txt', 0)
+        processed = Command().process(
+            [image, 'orphans/old.txt', 'orphans/fresh.txt'],
+            self.root,
+            None,
+            self.threshold,
+            False,
+        )
+        self.assertEqual(processed, 1)
+        self.assertTrue(os.path.exists(image_path))
+        self.assertTrue(os.path.exists(fresh))
+        self.assertFalse(os.path.exists(orphan))
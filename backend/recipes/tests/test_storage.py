@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from foodgram.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTest(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.root)
+
+    def list_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(path, name), self.root)
+            for path, _, names in os.walk(self.root)
+            for name in names
+        )
+
+    def test_same_content_is_saved_once(self):
+        first = self.storage.save('images/a.png', ContentFile(b'data'))
+        second = self.storage.save('images/b.png', ContentFile(b'data'))
+        self.assertEqual(first, second)
+        self.assertEqual(self.list_files(), [first])
+
+    def test_concurrent_save_reuses_existing_file(self):
+        """Файл появился между проверкой в save() и записью в _save()."""
+        content = ContentFile(b'data')
+        name = self.storage.get_hashed_name('images/a.png', content)
+        self.storage.save('images/a.png', ContentFile(b'data'))
+        self.assertEqual(self.storage._save(name, content), name)
+        self.assertEqual(self.list_files(), [name])
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'data')
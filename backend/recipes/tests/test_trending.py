@@ -0,0 +1,41 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+
+from api.tests.base import FoodgramAPITestCase
+from foodgram.constants import TRENDING_SAFETY_LAG
+from recipes import trending
+from recipes.models import Favorite, RecipeScore, ShoppingCart
+from recipes.trending import get_state, update_trending
+
+
+class UpdateTrendingTest(FoodgramAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.recipe_id = self.create_recipe('Плов')['id']
+
+    def test_recent_events_wait_for_safety_lag(self):
+        old = Favorite.objects.create(user=self.user, recipe_id=self.recipe_id)
+        Favorite.objects.filter(pk=old.pk).update(
+            created=timezone.now() - timedelta(seconds=TRENDING_SAFETY_LAG * 2)
+        )
+        recent = ShoppingCart.objects.create(
+            user=self.user, recipe_id=self.recipe_id
+        )
+        processed = update_trending()
+        self.assertEqual(processed['favorite'], 1)
+        self.assertEqual(processed['shoppingcart'], 0)
+        state = get_state()
+        self.assertEqual(state.favorite_last_id, old.pk)
+        self.assertLess(state.shoppingcart_last_id, recent.pk)
+
+    def test_deltas_are_applied_in_chunks(self):
+        other_id = self.create_recipe('Шурпа')['id']
+        with mock.patch.object(trending, 'TRENDING_LOOKUP_SIZE', 1):
+            trending.apply_deltas({self.recipe_id: 1.5, other_id: 1.0})
+        self.assertEqual(
+            dict(RecipeScore.objects.values_list('recipe_id', 'score')),
+            {self.recipe_id: 1.5, other_id: 1.0},
+        )
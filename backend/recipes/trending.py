@@ -0,0 +1,142 @@
+from collections import Counter
+from datetime import timedelta
+from math import exp, log
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from foodgram.constants import (
+    TRENDING_BATCH_SIZE,
+    TRENDING_CART_WEIGHT,
+    TRENDING_FAVORITE_WEIGHT,
+    TRENDING_HALF_LIFE,
+    TRENDING_LOCK_TIMEOUT,
+    TRENDING_LOOKUP_SIZE,
+    TRENDING_MIN_SCORE,
+    TRENDING_SAFETY_LAG,
+)
+
+from .models import Favorite, RecipeScore, ShoppingCart, TrendingState
+
+LOCK_KEY = 'trending:lock'
+DECAY_RATE = log(2) / TRENDING_HALF_LIFE
+
+# (модель событий, поле отметки в TrendingState, вес события)
+EVENT_SOURCES = (
+    (Favorite, 'favorite_last_id', TRENDING_FAVORITE_WEIGHT),
+    (ShoppingCart, 'shoppingcart_last_id', TRENDING_CART_WEIGHT),
+)
+
+
+class TrendingLocked(Exception):
+    pass
+
+
+def get_decay(moment, now):
+    return exp(-DECAY_RATE * max((now - moment).total_seconds(), 0))
+
+
+def get_state():
+    state, _ = TrendingState.objects.get_or_create(
+        pk=1, defaults={'computed_at': timezone.now()}
+    )
+    return state
+
+
+def decay_scores(state, now):
+    """Затухание всех рейтингов с прошлого расчёта - один UPDATE."""
+    factor = get_decay(state.computed_at, now)
+    if factor < 1:
+        RecipeScore.objects.update(score=F('score') * factor)
+    state.computed_at = now
+    state.save(update_fields=('computed_at',))
+
+
+def get_batch_deltas(model, start, end, weight, now):
+    """
+    Прирост рейтингов от событий с id из (start, end].
+    События группируются по рецепту и часу в базе,
+    в Python приходит по строке на пару рецепт-час.
+    Возвращает прирост по рецептам и число событий.
+    """
+    deltas = Counter()
+    total = 0
+    buckets = (
+        model.objects.filter(id__gt=start, id__lte=end)
+        .annotate(hour=TruncHour('created'))
+        .values('recipe_id', 'hour')
+        .annotate(events=Count('id'))
+        .order_by()
+        .values_list('recipe_id', 'hour', 'events')
+    )
+    for recipe_id, hour, events in buckets.iterator():
+        deltas[recipe_id] += weight * events * get_decay(hour, now)
+        total += events
+    return deltas, total
+
+
+def apply_deltas(deltas):
+    """
+    Добавляет прирост к рейтингам.
+    Рецепты обрабатываются по TRENDING_LOOKUP_SIZE, чтобы IN
+    не превышал лимит параметров запроса (в SQLite - 32766).
+    """
+    recipe_ids = list(deltas)
+    for start in range(0, len(recipe_ids), TRENDING_LOOKUP_SIZE):
+        chunk = recipe_ids[start:start + TRENDING_LOOKUP_SIZE]
+        RecipeScore.objects.bulk_create(
+            (RecipeScore(recipe_id=recipe_id) for recipe_id in chunk),
+            ignore_conflicts=True,
+        )
+        scores = list(RecipeScore.objects.filter(recipe_id__in=chunk))
+        for recipe_score in scores:
+            recipe_score.score += deltas[recipe_score.recipe_id]
+        RecipeScore.objects.bulk_update(
+            scores, ('score',), batch_size=TRENDING_LOOKUP_SIZE
+        )
+
+
+def update_trending(batch_size=TRENDING_BATCH_SIZE):
+    """
+    Инкрементальный пересчёт RecipeScore.
+    Старые рейтинги затухают, к ним добавляются только события
+    после отметок TrendingState. Пачки по batch_size id фиксируются
+    вместе с отметкой, так что прерванный расчёт продолжается с места
+    остановки. Отметка доходит только до событий старше
+    TRENDING_SAFETY_LAG: id выдаются до фиксации транзакции, и более
+    свежий id мог обогнать ещё не зафиксированный меньший.
+    Возвращает число учтённых событий по источникам.
+    """
+    if not cache.add(LOCK_KEY, True, TRENDING_LOCK_TIMEOUT):
+        raise TrendingLocked('Пересчёт рейтинга уже выполняется')
+    try:
+        now = timezone.now()
+        cutoff = now - timedelta(seconds=TRENDING_SAFETY_LAG)
+        with transaction.atomic():
+            state = get_state()
+            decay_scores(state, now)
+        processed = Counter()
+        for model, mark, weight in EVENT_SOURCES:
+            last_id = getattr(state, mark)
+            max_id = model.objects.filter(created__lte=cutoff).aggregate(
+                max_id=Max('id')
+            )['max_id']
+            while max_id and last_id < max_id:
+                end = min(last_id + batch_size, max_id)
+                deltas, events = get_batch_deltas(
+                    model, last_id, end, weight, now
+                )
+                with transaction.atomic():
+                    apply_deltas(deltas)
+                    TrendingState.objects.filter(pk=state.pk).update(
+                        **{mark: end}
+                    )
+                processed[model._meta.model_name] += events
+                last_id = end
+        RecipeScore.objects.filter(score__lt=TRENDING_MIN_SCORE).delete()
+        return processed
+    finally:
+        cache.delete(LOCK_KEY)
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.db import connection, transaction
+
+executors = {}
+executors_lock = Lock()
+
+
+def get_executor(name, max_workers):
+    """Именованный пул потоков процесса, создаётся при первом обращении."""
+    with executors_lock:
+        if name not in executors:
+            executors[name] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=name
+            )
+        return executors[name]
+
+
+def run_in_worker(function, *args):
+    """Задача пула: у каждого потока своё соединение с базой."""
+    try:
+        function(*args)
+    finally:
+        connection.close()
+
+
+def submit_on_commit(name, max_workers, function, *args):
+    """Ставит задачу в пул после фиксации текущей транзакции."""
+    transaction.on_commit(
+        lambda: get_executor(name, max_workers).submit(
+            run_in_worker, function, *args
+        )
+    )
@@ -10,28 +10,21 @@ class UserAdmin(BaseUserAdmin):
     """
     list_display = ('id', 'username', 'first_name',
                     'last_name', 'email',
-                    'get_recipe_count',
-                    'get_subscriber_count',)
+                    'recipes_count',
+                    'followers_count',)
     search_fields = ('username', 'email')
-    list_filter = ('username', 'email',)
+    list_filter = ('is_staff', 'is_active')
     empty_value_display = '-пусто-'
 
-    @admin.display(description='Количество рецептов')
-    def get_recipe_count(self, obj):
-        return obj.recipes.count()
-
-    @admin.display(description='Количество подписчиков')
-    def get_subscriber_count(self, obj):
-        return obj.subscriber.count()
-
 
 class SubscribedAdmin(admin.ModelAdmin):
     """
     Админ-зона подписок.
     """
     list_display = ('user', 'author')
-    list_filter = ('author',)
-    search_fields = ('user',)
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
 
 
 admin.site.register(User, UserAdmin)
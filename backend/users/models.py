@@ -3,12 +3,15 @@ from django.db import models
 from django.db.models import CheckConstraint, F, Q
 
 from foodgram.constants import MAX_VALUE_LENGTH_USER
+from foodgram.counters import CounterFieldsMixin
 from users.validate import validate_username
 
 
-class User(AbstractUser):
+class User(CounterFieldsMixin, AbstractUser):
     """Абстрактная модель пользователя."""
 
+    counter_fields = ('recipes_count', 'followers_count')
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = (
         'username',
@@ -39,6 +42,12 @@ class User(AbstractUser):
     last_name = models.CharField(
         'Фамилия', max_length=MAX_VALUE_LENGTH_USER
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов', default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0, editable=False
+    )
 
     class Meta:
         ordering = ('email',)